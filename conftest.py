@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _jobs_without_pool(settings):
+    """Функция отключает пул фоновых задач: потоки пула делят с тестом
+    базу SQLite в памяти и упираются в её блокировки таблиц."""
+    settings.JOBS_WORKERS = 0
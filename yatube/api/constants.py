@@ -0,0 +1,11 @@
+API_MAX_LIMIT = 100
+POST_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'comments_count',
+    'author__username',
+    'group__slug',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
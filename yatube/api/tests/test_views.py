@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test title',
+            slug='test-slug',
+            description='test description',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'post {index}')
+            for index in range(5)
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='последний пост',
+        )
+        Comment.objects.create(post=cls.post, author=cls.user, text='first')
+        Comment.objects.create(post=cls.post, author=cls.user, text='second')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        cache.clear()
+
+    def test_feeds_paginate_by_cursor(self):
+        """Функция проверяет, что ленты API листаются по курсору."""
+        urls = (
+            reverse('api:feed'),
+            reverse('api:group_feed', kwargs={'slug': self.group.slug}),
+            reverse(
+                'api:profile_feed', kwargs={'username': self.author.username},
+            ),
+            reverse('api:follow_feed'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.user_client.get(url, {'limit': 4}).json()
+                self.assertEqual(len(first['results']), 4)
+                self.assertIsNone(first['previous'])
+                self.assertEqual(first['results'][0]['id'], self.post.id)
+                second = self.user_client.get(
+                    url, {'limit': 4, 'after': first['next']},
+                ).json()
+                self.assertEqual(len(second['results']), 2)
+                self.assertIsNone(second['next'])
+                ids = [row['id'] for row in first['results']]
+                ids += [row['id'] for row in second['results']]
+                self.assertEqual(
+                    ids,
+                    list(Post.objects.order_by(
+                        '-pub_date', '-id',
+                    ).values_list('id', flat=True)),
+                )
+
+    def test_post_fields(self):
+        """Функция проверяет поля поста и компактность ответа."""
+        response = self.client.get(
+            reverse('api:post', kwargs={'post_id': self.post.id})
+        )
+        data = response.json()
+        self.assertEqual(data['text'], 'последний пост')
+        self.assertEqual(data['author'], self.author.username)
+        self.assertEqual(data['group'], self.group.slug)
+        self.assertEqual(data['comments_count'], 2)
+        self.assertIsNone(data['image'])
+        self.assertIn('последний пост'.encode(), response.content)
+        self.assertNotIn(b'": ', response.content)
+
+    def test_comments_oldest_first(self):
+        """Функция проверяет порядок и курсор комментариев."""
+        url = reverse('api:post_comments', kwargs={'post_id': self.post.id})
+        first = self.client.get(url, {'limit': 1}).json()
+        self.assertEqual([row['text'] for row in first['results']], ['first'])
+        second = self.client.get(url, {'after': first['next']}).json()
+        self.assertEqual(
+            [row['text'] for row in second['results']], ['second'],
+        )
+
+    def test_etag_not_modified(self):
+        """Функция проверяет ответ 304 и новый ETag после изменения."""
+        url = reverse('api:feed')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='new post')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_feed_is_one_query(self):
+        """Функция проверяет, что страница ленты читается одним запросом."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:feed'))
+
+    def test_errors(self):
+        """Функция проверяет ошибки API в JSON."""
+        cases = (
+            (self.client, reverse('api:follow_feed'), 401),
+            (self.client, reverse('api:post', kwargs={'post_id': 0}), 404),
+            (
+                self.client,
+                reverse('api:group_feed', kwargs={'slug': 'missing'}),
+                404,
+            ),
+            (
+                self.client,
+                reverse('api:post_comments', kwargs={'post_id': 0}),
+                404,
+            ),
+        )
+        for client, url, status in cases:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+        response = self.client.post(reverse('api:feed'))
+        self.assertEqual(response.status_code, 405)
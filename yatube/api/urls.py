@@ -0,0 +1,38 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path(
+        'posts/',
+        views.feed,
+        name='feed',
+    ),
+    path(
+        'groups/<slug:slug>/posts/',
+        views.group_feed,
+        name='group_feed',
+    ),
+    path(
+        'profiles/<str:username>/posts/',
+        views.profile_feed,
+        name='profile_feed',
+    ),
+    path(
+        'follow/',
+        views.follow_feed,
+        name='follow_feed',
+    ),
+    path(
+        'posts/<int:post_id>/',
+        views.post,
+        name='post',
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
+]
@@ -0,0 +1,170 @@
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from posts.cache import (cache_feed, feed_etag, follow_versions,
+                         group_versions, index_versions, post_versions,
+                         profile_versions)
+from posts.constants import COMMENT_ORDERING, POST_COUNT
+from posts.models import Comment, Group, Post, User
+from posts.storage import post_images
+from posts.timeline import HybridTimelinePaginator
+from posts.utils import CursorPaginator, cursor_page
+
+from .constants import API_MAX_LIMIT, COMMENT_FIELDS, POST_FIELDS
+
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def json_response(data, status=200):
+    """Функция возвращает компактный JSON без пробелов и \\u-escape."""
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(feed_versions, login_required=False):
+    """
+    Декоратор представления API: разрешает только GET и HEAD,
+    отдает ETag и кэширует ответ по версиям лент, ошибку 404
+    возвращает в JSON. С login_required анонимам отдается 401.
+    """
+    def decorator(view):
+        cached = condition(etag_func=feed_etag(feed_versions))(
+            cache_feed(feed_versions)(view)
+        )
+
+        @require_safe
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if login_required and not request.user.is_authenticated:
+                return json_response(
+                    {'detail': 'Требуется авторизация'}, status=401,
+                )
+            try:
+                return cached(request, *args, **kwargs)
+            except Http404 as error:
+                return json_response(
+                    {'detail': str(error) or 'Не найдено'}, status=404,
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def page_limit(request):
+    """Размер страницы из параметра limit, от 1 до API_MAX_LIMIT."""
+    try:
+        limit = int(request.GET.get('limit', POST_COUNT))
+    except ValueError:
+        limit = POST_COUNT
+
+    return min(max(limit, 1), API_MAX_LIMIT)
+
+
+def post_data(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': post_images.url(row['image']) if row['image'] else None,
+        'comments_count': row['comments_count'],
+    }
+
+
+def comment_data(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def page_response(page, serialize):
+    """Функция собирает ответ со страницей и курсорами соседних."""
+    return json_response({
+        'results': [serialize(row) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def feed_page(request, posts):
+    paginator = CursorPaginator(
+        posts.values(*POST_FIELDS),
+        page_limit(request),
+    )
+
+    return cursor_page(request, paginator)
+
+
+@api_view(index_versions)
+def feed(request):
+    """Лента всех постов, новые первыми."""
+    return page_response(feed_page(request, Post.objects.all()), post_data)
+
+
+@api_view(group_versions)
+def group_feed(request, slug):
+    """
+    Лента постов группы. Существование группы проверяется
+    отдельным запросом, только если страница пуста.
+    """
+    page = feed_page(request, Post.objects.filter(group__slug=slug))
+    if not page.object_list and not Group.objects.filter(slug=slug).exists():
+        raise Http404('Группа не найдена')
+
+    return page_response(page, post_data)
+
+
+@api_view(profile_versions)
+def profile_feed(request, username):
+    """Лента постов автора."""
+    page = feed_page(request, Post.objects.filter(author__username=username))
+    if not page.object_list and not User.objects.filter(
+        username=username,
+    ).exists():
+        raise Http404('Пользователь не найден')
+
+    return page_response(page, post_data)
+
+
+@api_view(follow_versions, login_required=True)
+def follow_feed(request):
+    """Лента подписок пользователя."""
+    paginator = HybridTimelinePaginator(
+        request.user,
+        page_limit(request),
+        Post.objects.values(*POST_FIELDS),
+    )
+
+    return page_response(cursor_page(request, paginator), post_data)
+
+
+@api_view(post_versions)
+def post(request, post_id):
+    """Пост по id."""
+    row = Post.objects.filter(id=post_id).values(*POST_FIELDS).first()
+    if row is None:
+        raise Http404('Пост не найден')
+
+    return json_response(post_data(row))
+
+
+@api_view(post_versions)
+def post_comments(request, post_id):
+    """Комментарии к посту, старые первыми."""
+    comments = Comment.objects.filter(post=post_id).values(*COMMENT_FIELDS)
+    paginator = CursorPaginator(
+        comments,
+        page_limit(request),
+        ordering=COMMENT_ORDERING,
+    )
+    page = cursor_page(request, paginator)
+    if not page.object_list and not Post.objects.filter(id=post_id).exists():
+        raise Http404('Пост не найден')
+
+    return page_response(page, comment_data)
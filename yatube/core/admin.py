@@ -0,0 +1,39 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Класс, описывающий отображаемые поля в админке для модели Job,
+    list_display - список полей для отображения,
+    list_filter  - поля, по которым фильтруется список,
+    search_fields - поле по которому работает поиск,
+    actions      - повторный запуск выбранных задач.
+    """
+
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'created',
+    )
+    list_filter = (
+        'status',
+        'name',
+    )
+    search_fields = (
+        'name',
+    )
+    actions = (
+        'requeue',
+    )
+
+    def requeue(self, request, queryset):
+        queryset.update(status=Job.QUEUED, attempts=0, run_at=timezone.now())
+
+    requeue.short_description = 'Поставить в очередь повторно'
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from django.db.backends.signals import connection_created
+
+        from .db import configure_sqlite, periodic_checkpoint
+
+        connection_created.connect(configure_sqlite)
+        request_finished.connect(periodic_checkpoint)
@@ -0,0 +1,111 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+
+from .cache_backends import TwoTierCache
+
+WAIT_INTERVAL = 0.05
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def shared_cache(using=DEFAULT_CACHE_ALIAS):
+    """
+    Функция возвращает общий для процессов кэш для блокировок
+    пересборки: у двухуровневого кэша - его L2. Блокировки не попадают
+    в L1 процессов, а их снятие не сбрасывает L1 во всех процессах.
+    """
+    cache = caches[using]
+    if isinstance(cache, TwoTierCache):
+        return cache.l2
+
+    return cache
+
+
+def acquire(key, timeout=None, using=DEFAULT_CACHE_ALIAS):
+    """
+    Функция захватывает блокировку пересборки ключа атомарным
+    cache.add. Блокировка снимается сама через timeout секунд,
+    если пересобиравший процесс упал.
+    """
+    return shared_cache(using).add(
+        lock_key(key), 1, timeout or settings.CACHE_LOCK_TIMEOUT,
+    )
+
+
+def release(key, using=DEFAULT_CACHE_ALIAS):
+    shared_cache(using).delete(lock_key(key))
+
+
+def wait_for(key, wait=None, using=DEFAULT_CACHE_ALIAS):
+    """
+    Функция ждет не дольше wait секунд, пока другой процесс
+    положит значение в кэш. Ожидание прекращается, если блокировка
+    снята без записи (значение нельзя кэшировать). Значение
+    и блокировка читаются из общего кэша.
+    Возвращает значение или None.
+    """
+    cache = shared_cache(using)
+    deadline = time.monotonic() + (
+        settings.CACHE_LOCK_WAIT if wait is None else wait
+    )
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        found = cache.get_many([key, lock_key(key)])
+        if key in found:
+            return found[key]
+        if lock_key(key) not in found:
+            break
+
+    return None
+
+
+def expires_early(delta, expiry, beta=None):
+    """
+    Вероятностное раннее истечение (XFetch): чем ближе срок
+    и чем дольше собиралось значение (delta), тем вероятнее,
+    что очередной читатель пересоберет его заранее.
+    """
+    beta = settings.CACHE_XFETCH_BETA if beta is None else beta
+    return time.time() - delta * beta * math.log(1 - random.random()) >= expiry
+
+
+def get_or_build(key, build, timeout, cacheable=None,
+                 using=DEFAULT_CACHE_ALIAS):
+    """
+    Функция возвращает значение из кэша или собирает его build().
+    Пересобирает значение только один вызывающий (single-flight):
+    остальные получают прежнее значение, а если его нет - ждут
+    CACHE_LOCK_WAIT секунд и после этого собирают сами без записи
+    в кэш. Значение пересобирается немного раньше срока (XFetch),
+    поэтому популярные ключи обычно не истекают совсем.
+    timeout     - время жизни в секундах, None - бессрочно,
+    cacheable   - проверка, что собранное значение можно кэшировать.
+    """
+    cache = caches[using]
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expiry = entry
+        if not expires_early(delta, expiry):
+            return value
+    if not acquire(key, using=using):
+        if entry is not None:
+            return value
+        entry = wait_for(key, using=using)
+        return build() if entry is None else entry[0]
+    try:
+        started = time.time()
+        value = build()
+        if cacheable is None or cacheable(value):
+            delta = time.time() - started
+            expiry = math.inf if timeout is None else time.time() + timeout
+            cache.set(key, (value, delta, expiry), timeout)
+    finally:
+        release(key, using=using)
+
+    return value
@@ -0,0 +1,515 @@
+import itertools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+    'expires REAL, accessed REAL NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+LIVE = '(expires IS NULL OR expires > ?)'
+UPSERT = (
+    'INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+    'expires = excluded.expires, accessed = excluded.accessed'
+)
+
+STAMP_KEY = 'two_tier:stamp'
+STATS_KEYS = ('two_tier:stats:l1', 'two_tier:stats:l2', 'two_tier:stats:miss')
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def encode(value):
+    """
+    Целые числа хранятся как INTEGER, чтобы incr выполнялся
+    одним UPDATE, остальные значения сериализуются pickle.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def decode(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кэш в файле SQLite (LOCATION), общий для всех процессов сервера
+    и не требующий отдельного сервиса. Журнал WAL позволяет читать
+    параллельно с записью, incr атомарен на уровне базы.
+    При переполнении удаляются записи, которые дольше всех
+    не читались (LRU). OPTIONS:
+    MAX_ENTRIES     - число записей, после которого начинается очистка,
+    CULL_FREQUENCY  - при очистке удаляется 1/CULL_FREQUENCY записей,
+    CULL_INTERVAL   - размер проверяется раз в столько записей процесса,
+    TOUCH_INTERVAL  - время чтения обновляется не чаще, чем раз
+                      в столько секунд, чтобы чтение не было записью.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self._cull_interval = int(options.get('CULL_INTERVAL', 100))
+        self._touch_interval = float(options.get('TOUCH_INTERVAL', 1))
+        self._sets = itertools.count(1)
+        self._local = threading.local()
+
+    def _connection(self):
+        """
+        Соединение открывается на каждый поток и переоткрывается
+        после fork, соединения SQLite нельзя делить между процессами.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.location,
+                timeout=5,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _touch_read(self, keys, accessed, now):
+        stale = [
+            key for key in keys if now - accessed[key] > self._touch_interval
+        ]
+        if stale:
+            marks = ', '.join('?' * len(stale))
+            self._connection().execute(
+                f'UPDATE cache SET accessed = ? WHERE key IN ({marks})',
+                [now, *stale],
+            )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._connection().execute(
+            f'SELECT value, accessed FROM cache WHERE key = ? AND {LIVE}',
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return default
+        self._touch_read([key], {key: row[1]}, now)
+
+        return decode(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        marks = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({marks}) AND {LIVE}',
+            [*keys, now],
+        ).fetchall()
+        self._touch_read(
+            [row[0] for row in rows], {row[0]: row[2] for row in rows}, now,
+        )
+
+        return {keys[row[0]]: decode(row[1]) for row in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._connection().execute(
+            UPSERT, (key, encode(value), self._expires(timeout), time.time()),
+        )
+        self._maybe_cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        now = time.time()
+        rows = [
+            (self._key(key, version), encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(UPSERT, rows)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self._maybe_cull()
+
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Записывает значение, только если ключа нет или он истек."""
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            'INSERT INTO cache (key, value, expires, accessed) '
+            'VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed '
+            'WHERE cache.expires IS NOT NULL '
+            'AND cache.expires <= excluded.accessed',
+            (key, encode(value), self._expires(timeout), time.time()),
+        )
+        if cursor.rowcount:
+            self._maybe_cull()
+
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {LIVE}',
+            (self._expires(timeout), key, time.time()),
+        )
+
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно увеличивает целое значение одним UPDATE."""
+        name = self._key(key, version)
+        rows = self._connection().execute(
+            f'UPDATE cache SET value = value + ? WHERE key = ? AND {LIVE} '
+            f"AND typeof(value) = 'integer' RETURNING value",
+            (delta, name, time.time()),
+        ).fetchall()
+        if not rows:
+            raise ValueError(f"Key '{key}' not found")
+
+        return rows[0][0]
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._connection().execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}',
+            (key, time.time()),
+        ).fetchone()
+
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', (key,),
+        )
+
+        return bool(cursor.rowcount)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            marks = ', '.join('?' * len(keys))
+            self._connection().execute(
+                f'DELETE FROM cache WHERE key IN ({marks})', keys,
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def _maybe_cull(self):
+        if next(self._sets) % self._cull_interval == 0:
+            self.cull()
+
+    def cull(self):
+        """
+        Удаляет истекшие записи, а если записей больше MAX_ENTRIES -
+        лишние и еще 1/CULL_FREQUENCY, начиная с давно не читанных.
+        """
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),),
+            )
+            count = connection.execute(
+                'SELECT COUNT(*) FROM cache'
+            ).fetchone()[0]
+            if count > self._max_entries:
+                if self._cull_frequency == 0:
+                    connection.execute('DELETE FROM cache')
+                else:
+                    excess = count - self._max_entries + (
+                        self._max_entries // self._cull_frequency
+                    )
+                    connection.execute(
+                        'DELETE FROM cache WHERE key IN ('
+                        'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                        (excess,),
+                    )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+
+class LocalTier:
+    """
+    Общее для всех потоков процесса состояние L1: LRU-словарь
+    сериализованных значений, известная процессу метка
+    инвалидации и еще не переданные в L2 счетчики попаданий.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stamp = None
+        self.stamp_checked = 0
+        self.stats_flushed = time.monotonic()
+        self.counts = [0, 0, 0]
+
+
+class TwoTierCache(BaseCache):
+    """
+    Двухуровневый кэш: небольшой LRU в памяти процесса (L1) перед
+    общим кэшем (L2, алиас из LOCATION). Значение живет в L1
+    не дольше L1_TIMEOUT секунд. Удаление и incr в любом процессе
+    увеличивают метку инвалидации в L2, процессы сверяют ее не чаще
+    раза в STAMP_INTERVAL секунд и при изменении очищают свой L1,
+    поэтому изменения постов и комментариев (версии лент и карточки)
+    видны в других процессах почти сразу. Перезапись ключа через set
+    видна в других процессах не позже L1_TIMEOUT.
+    Счетчики попаданий в L1, L2 и промахов раз в STATS_INTERVAL
+    секунд суммируются в L2, их показывает команда cache_stats.
+    OPTIONS: L1_MAX_ENTRIES, L1_TIMEOUT, STAMP_INTERVAL, STATS_INTERVAL.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._stamp_interval = float(options.get('STAMP_INTERVAL', 0.5))
+        self._stats_interval = float(options.get('STATS_INTERVAL', 10))
+        with _tiers_lock:
+            self._tier = _tiers.setdefault(location, LocalTier())
+
+    @property
+    def l2(self):
+        return caches[self.location]
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _l1_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.l2.default_timeout
+        if timeout is None:
+            return self._l1_timeout
+        return min(self._l1_timeout, timeout)
+
+    def _l1_get(self, key):
+        tier = self._tier
+        with tier.lock:
+            entry = tier.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del tier.entries[key]
+                return None
+            tier.entries.move_to_end(key)
+
+        return entry
+
+    def _l1_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        ttl = self._l1_ttl(timeout)
+        tier = self._tier
+        if ttl <= 0:
+            self._l1_delete([key])
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with tier.lock:
+            tier.entries[key] = (data, time.monotonic() + ttl)
+            tier.entries.move_to_end(key)
+            while len(tier.entries) > self._l1_max_entries:
+                tier.entries.popitem(last=False)
+
+    def _l1_delete(self, keys):
+        with self._tier.lock:
+            for key in keys:
+                self._tier.entries.pop(key, None)
+
+    def _count(self, l1=0, l2=0, miss=0):
+        tier = self._tier
+        with tier.lock:
+            tier.counts[0] += l1
+            tier.counts[1] += l2
+            tier.counts[2] += miss
+
+    def _check_stamp(self):
+        """Сверяет метку инвалидации с L2 не чаще STAMP_INTERVAL."""
+        tier = self._tier
+        now = time.monotonic()
+        if now - tier.stamp_checked < self._stamp_interval:
+            return
+        tier.stamp_checked = now
+        stamp = self.l2.get(STAMP_KEY)
+        with tier.lock:
+            if stamp != tier.stamp:
+                tier.stamp = stamp
+                tier.entries.clear()
+        if now - tier.stats_flushed >= self._stats_interval:
+            self.flush_stats()
+
+    def _invalidate(self):
+        """Увеличивает метку инвалидации и очищает свой L1."""
+        try:
+            stamp = self.l2.incr(STAMP_KEY)
+        except ValueError:
+            stamp = time.time_ns()
+            self.l2.set(STAMP_KEY, stamp, None)
+        tier = self._tier
+        with tier.lock:
+            tier.stamp = stamp
+            tier.stamp_checked = time.monotonic()
+            tier.entries.clear()
+
+    def get(self, key, default=None, version=None):
+        self._check_stamp()
+        entry = self._l1_get(self._key(key, version))
+        if entry is not None:
+            self._count(l1=1)
+            return pickle.loads(entry[0])
+        value = self.l2.get(key, version=version)
+        if value is None:
+            self._count(miss=1)
+            return default
+        self._count(l2=1)
+        self._l1_set(self._key(key, version), value)
+
+        return value
+
+    def get_many(self, keys, version=None):
+        self._check_stamp()
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self._l1_get(self._key(key, version))
+            if entry is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(entry[0])
+        fetched = self.l2.get_many(missing, version=version)
+        for key, value in fetched.items():
+            self._l1_set(self._key(key, version), value)
+        self._count(
+            l1=len(found),
+            l2=len(fetched),
+            miss=len(missing) - len(fetched),
+        )
+        found.update(fetched)
+
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._l1_set(self._key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._l1_set(self._key(key, version), value, timeout)
+
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._l1_set(self._key(key, version), value, timeout)
+
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_delete([self._key(key, version)])
+        return self.l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        self._invalidate()
+
+        return value
+
+    def delete(self, key, version=None):
+        self.l2.delete(key, version=version)
+        self._invalidate()
+
+    def delete_many(self, keys, version=None):
+        self.l2.delete_many(keys, version=version)
+        self._invalidate()
+
+    def clear(self):
+        self.l2.clear()
+        self._invalidate()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def flush_stats(self):
+        """Прибавляет счетчики процесса к общим счетчикам в L2."""
+        tier = self._tier
+        with tier.lock:
+            counts = tier.counts
+            tier.counts = [0, 0, 0]
+            tier.stats_flushed = time.monotonic()
+        for key, count in zip(STATS_KEYS, counts):
+            if not count:
+                continue
+            self.l2.add(key, 0, None)
+            try:
+                self.l2.incr(key, count)
+            except ValueError:
+                self.l2.set(key, count, None)
+
+    def stats(self):
+        """
+        Возвращает число попаданий в L1, L2, промахов и доли
+        попаданий по всем процессам.
+        """
+        self.flush_stats()
+        counts = self.l2.get_many(STATS_KEYS)
+        l1, l2, miss = (counts.get(key, 0) for key in STATS_KEYS)
+        total = l1 + l2 + miss
+
+        return {
+            'l1_hits': l1,
+            'l2_hits': l2,
+            'misses': miss,
+            'l1_ratio': l1 / total if total else 0,
+            'l2_ratio': l2 / total if total else 0,
+        }
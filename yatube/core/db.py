@@ -0,0 +1,57 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+_checkpoint_lock = threading.Lock()
+_last_checkpoint = time.monotonic()
+
+
+def apply_pragmas(cursor, pragmas):
+    """Функция применяет профиль PRAGMA к соединению SQLite."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: применяет к новым соединениям
+    с SQLite профиль settings.SQLITE_PRAGMAS.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+
+
+def checkpoint(using='default', mode='PASSIVE'):
+    """
+    Функция переносит журнал WAL в основной файл базы.
+    Возвращает (busy, страниц в журнале, перенесено страниц).
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        return cursor.fetchone()
+
+
+def periodic_checkpoint(sender, **kwargs):
+    """
+    Обработчик request_finished: не чаще одного раза
+    в settings.SQLITE_CHECKPOINT_INTERVAL секунд выполняет
+    пассивный checkpoint, чтобы журнал WAL не рос между
+    автоматическими checkpoint под постоянной нагрузкой.
+    """
+    global _last_checkpoint
+    if connections['default'].vendor != 'sqlite':
+        return
+    now = time.monotonic()
+    if now - _last_checkpoint < settings.SQLITE_CHECKPOINT_INTERVAL:
+        return
+    if not _checkpoint_lock.acquire(blocking=False):
+        return
+    try:
+        _last_checkpoint = now
+        checkpoint()
+    finally:
+        _checkpoint_lock.release()
@@ -0,0 +1,175 @@
+import json
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS = {}
+_executor = None
+
+
+def job(func):
+    """
+    Декоратор регистрирует функцию как фоновую задачу и добавляет
+    ей метод delay, который ставит вызов в очередь.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+    JOBS[name] = func
+    func.job_name = name
+    func.delay = lambda *args, **kwargs: enqueue(name, *args, **kwargs)
+
+    return func
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.JOBS_WORKERS,
+            thread_name_prefix='jobs',
+        )
+
+    return _executor
+
+
+def pool_enabled():
+    """
+    Функция проверяет, выполнять ли задачи в пуле потоков процесса.
+    При JOBS_WORKERS = 0 задачи только сохраняются для run_jobs.
+    """
+    return bool(settings.JOBS_WORKERS)
+
+
+def enqueue(name, *args, **kwargs):
+    """
+    Функция сохраняет задачу в таблицу в текущей транзакции,
+    а после коммита передает ее пулу потоков процесса. Если процесс
+    завершится раньше, задачу выполнит команда run_jobs.
+    Аргументы задачи должны сериализоваться в JSON.
+    """
+    queued = Job.objects.create(
+        name=name,
+        payload=json.dumps(
+            {'args': args, 'kwargs': kwargs},
+            cls=DjangoJSONEncoder,
+        ),
+    )
+    if pool_enabled():
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_worker, queued.pk)
+        )
+
+    return queued
+
+
+def resolve(name):
+    """Функция возвращает зарегистрированную функцию задачи по пути."""
+    if name not in JOBS:
+        import_string(name)
+
+    return JOBS[name]
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой, удваивается с каждой."""
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def requeue_stale(now):
+    """
+    Функция возвращает в очередь задачи, зависшие дольше
+    settings.JOBS_TIMEOUT (например, воркер упал во время задачи),
+    с той же задержкой, что и после ошибки. Задачи, исчерпавшие
+    settings.JOBS_MAX_ATTEMPTS попыток, помечаются как ошибочные,
+    чтобы задача, роняющая воркер, не повторялась бесконечно.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.JOBS_TIMEOUT),
+    )
+    stale.filter(attempts__gte=settings.JOBS_MAX_ATTEMPTS).update(
+        status=Job.FAILED,
+        last_error='Задача прервана: превышен JOBS_TIMEOUT',
+    )
+    attempts = stale.order_by().values_list('attempts', flat=True)
+    for count in set(attempts):
+        stale.filter(attempts=count).update(
+            status=Job.QUEUED,
+            run_at=now + retry_delay(max(count, 1)),
+        )
+
+
+def due_jobs(limit=None):
+    """
+    Функция возвращает id задач, готовых к выполнению,
+    предварительно возвращая в очередь зависшие задачи.
+    """
+    now = timezone.now()
+    requeue_stale(now)
+    ids = Job.objects.filter(
+        status=Job.QUEUED,
+        run_at__lte=now,
+    ).values_list('id', flat=True)
+
+    return list(ids[:limit])
+
+
+def run_job(job_id):
+    """
+    Функция выполняет задачу, если ее удалось захватить. Захват -
+    атомарный UPDATE по состоянию, поэтому задачу выполнит только
+    один из воркеров. При ошибке задача повторяется с экспоненциальной
+    задержкой, после settings.JOBS_MAX_ATTEMPTS попыток помечается
+    как ошибочная. Возвращает True, если задача выполнялась.
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(
+        pk=job_id,
+        status=Job.QUEUED,
+        run_at__lte=now,
+    ).update(status=Job.RUNNING, started_at=now, attempts=F('attempts') + 1)
+    if not claimed:
+        return False
+    queued = Job.objects.get(pk=job_id)
+    try:
+        payload = json.loads(queued.payload)
+        resolve(queued.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s (%s) завершилась с ошибкой',
+                         queued.pk, queued.name)
+        result = {'status': Job.FAILED, 'last_error': traceback.format_exc()}
+        if queued.attempts < settings.JOBS_MAX_ATTEMPTS:
+            result['status'] = Job.QUEUED
+            result['run_at'] = timezone.now() + retry_delay(queued.attempts)
+    else:
+        result = {'status': Job.DONE, 'last_error': ''}
+    Job.objects.filter(pk=job_id).update(**result)
+
+    return True
+
+
+def run_in_worker(job_id):
+    """Выполняет задачу в потоке пула и закрывает его соединения."""
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_pending(limit=None):
+    """
+    Функция выполняет в текущем потоке задачи, готовые
+    к выполнению. Возвращает число выполненных задач.
+    """
+    return sum(run_job(job_id) for job_id in due_jobs(limit))
@@ -0,0 +1,106 @@
+import os
+import statistics
+import tempfile
+import time
+from multiprocessing import get_context
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+
+def create_backends(directory, max_entries):
+    params = {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    return {
+        'locmem': LocMemCache('bench', params),
+        'file': FileBasedCache(os.path.join(directory, 'files'), params),
+        'sqlite': SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), params,
+        ),
+    }
+
+
+def increment(backend, count):
+    for _ in range(count):
+        backend.incr('counter')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает кэши locmem, file и sqlite: задержку попадания, '
+        'записи и get_many, а также сохранность incr при одновременной '
+        'работе нескольких процессов. Работает во временном каталоге.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--reads', type=int, default=20000)
+        parser.add_argument('--size', type=int, default=2048)
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--increments', type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"backend":<8}{"get p50 us":>12}{"get p99 us":>12}'
+            f'{"set us":>10}{"get_many us":>13}{"incr lost":>11}'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            backends = create_backends(directory, options['keys'] * 2)
+            for name, backend in backends.items():
+                result = self.run(backend, options)
+                self.stdout.write(
+                    f'{name:<8}{result[0]:>12.1f}{result[1]:>12.1f}'
+                    f'{result[2]:>10.1f}{result[3]:>13.1f}{result[4]:>11}'
+                )
+
+    def run(self, backend, options):
+        value = {'html': 'x' * options['size']}
+        keys = [f'bench:{index}' for index in range(options['keys'])]
+        started = time.perf_counter()
+        for key in keys:
+            backend.set(key, value)
+        set_us = (time.perf_counter() - started) * 1e6 / len(keys)
+        timings = []
+        for index in range(options['reads']):
+            started = time.perf_counter()
+            backend.get(keys[index % len(keys)])
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        started = time.perf_counter()
+        for index in range(0, len(keys), 10):
+            backend.get_many(keys[index:index + 10])
+        many_us = (time.perf_counter() - started) * 1e6 / (len(keys) / 10)
+
+        return (
+            statistics.median(timings),
+            timings[int(len(timings) * 0.99) - 1],
+            set_us,
+            many_us,
+            self.lost_increments(backend, options),
+        )
+
+    def lost_increments(self, backend, options):
+        """
+        Число потерянных инкрементов при работе нескольких процессов.
+        Для locmem процессы видят свои копии кэша, поэтому итог
+        в родительском процессе не меняется.
+        """
+        backend.set('counter', 0)
+        context = get_context('fork')
+        workers = [
+            context.Process(
+                target=increment, args=(backend, options['increments']),
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return (
+            options['processes'] * options['increments']
+            - backend.get('counter')
+        )
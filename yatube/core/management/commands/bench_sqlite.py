@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при смешанной нагрузке '
+        'чтения и записи с журналом по-умолчанию и с профилем '
+        'settings.SQLITE_PRAGMAS. Работает на временном файле базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"profile":<10}{"reads/s":>10}{"writes/s":>10}{"errors":>8}'
+        )
+        for name, pragmas in (
+            ('default', DEFAULT_PRAGMAS),
+            ('tuned', settings.SQLITE_PRAGMAS),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                reads, writes, errors = self.run(path, pragmas, options)
+            self.stdout.write(
+                f'{name:<10}{reads / options["seconds"]:>10.0f}'
+                f'{writes / options["seconds"]:>10.0f}{errors:>8}'
+            )
+
+    def connect(self, path, pragmas):
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+        apply_pragmas(connection.cursor(), pragmas)
+        return connection
+
+    def prepare(self, path, pragmas, rows):
+        connection = self.connect(path, pragmas)
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, author INTEGER, '
+            'text TEXT, pub_date REAL)'
+        )
+        connection.execute('CREATE INDEX post_feed ON post (pub_date, id)')
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO post (author, text, pub_date) VALUES (?, ?, ?)',
+            ((index % 100, 'text ' * 50, index) for index in range(rows)),
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run(self, path, pragmas, options):
+        deadline = time.monotonic() + options['seconds']
+        counters = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def reader():
+            connection = self.connect(path, pragmas)
+            done = 0
+            while time.monotonic() < deadline:
+                connection.execute(
+                    'SELECT id, author, text FROM post '
+                    'ORDER BY pub_date DESC, id DESC LIMIT 10'
+                ).fetchall()
+                done += 1
+            connection.close()
+            with lock:
+                counters['reads'] += done
+
+        def writer():
+            connection = self.connect(path, pragmas)
+            done = errors = 0
+            while time.monotonic() < deadline:
+                try:
+                    connection.execute('BEGIN IMMEDIATE')
+                    connection.execute(
+                        'INSERT INTO post (author, text, pub_date) '
+                        'VALUES (?, ?, ?)',
+                        (1, 'text ' * 50, time.time()),
+                    )
+                    connection.execute('COMMIT')
+                    done += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+            connection.close()
+            with lock:
+                counters['writes'] += done
+                counters['errors'] += errors
+
+        threads = [
+            threading.Thread(target=reader) for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=writer) for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return counters['reads'], counters['writes'], counters['errors']
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания в L1 и L2 двухуровневых кэшей, '
+        'суммированные по всем процессам.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"cache":<12}{"l1 hits":>10}{"l2 hits":>10}{"misses":>10}'
+            f'{"l1 ratio":>10}{"l2 ratio":>10}'
+        )
+        for alias in settings.CACHES:
+            backend = caches[alias]
+            if not hasattr(backend, 'stats'):
+                continue
+            stats = backend.stats()
+            self.stdout.write(
+                f'{alias:<12}{stats["l1_hits"]:>10}{stats["l2_hits"]:>10}'
+                f'{stats["misses"]:>10}{stats["l1_ratio"]:>10.1%}'
+                f'{stats["l2_ratio"]:>10.1%}'
+            )
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.jobs import due_jobs, run_in_worker, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из таблицы задач: повторяет упавшие, '
+        'подбирает задачи, не выполненные веб-процессом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.JOBS_WORKERS or 1,
+            help='Число потоков, при 0 задачи выполняются в этом потоке.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=100,
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        executor = None
+        if options['workers']:
+            executor = ThreadPoolExecutor(
+                max_workers=options['workers'],
+                thread_name_prefix='jobs',
+            )
+        done = 0
+        try:
+            while True:
+                if executor is None:
+                    ran = run_pending(options['batch'])
+                else:
+                    ran = sum(executor.map(
+                        run_in_worker, due_jobs(options['batch']),
+                    ))
+                done += ran
+                if ran:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.db import checkpoint
+
+
+class Command(BaseCommand):
+    help = 'Переносит журнал WAL SQLite в основной файл базы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            default='TRUNCATE',
+            choices=('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'),
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        busy, log, moved = checkpoint(options['database'], options['mode'])
+        self.stdout.write(
+            f'busy: {busy}, страниц в журнале: {log}, перенесено: {moved}'
+        )
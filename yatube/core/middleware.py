@@ -0,0 +1,152 @@
+import copy
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+
+from .cache import acquire, release, wait_for
+from .jobs import pool_enabled
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'page_cache_generation'
+
+_refresher = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix='page-cache',
+)
+
+
+def invalidate_pages():
+    """
+    Функция помечает все закэшированные страницы устаревшими:
+    они еще отдаются, но при следующем запросе пересобираются.
+    """
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def page_cache_key(request):
+    url = request.build_absolute_uri()
+
+    return 'page_cache:' + hashlib.md5(url.encode()).hexdigest()
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Кэширует целые страницы для анонимных GET-запросов к разделам
+    settings.PAGE_CACHE_NAMESPACES. Запросы с cookie сессии (вошедшие
+    пользователи) идут мимо кэша. Страница считается свежей
+    PAGE_CACHE_TIMEOUT секунд, после этого еще PAGE_CACHE_STALE секунд
+    отдается прежняя копия, пока один фоновый поток собирает новую.
+    Так же устаревают все страницы после invalidate_pages().
+    Отсутствующую в кэше страницу собирает один запрос, остальные
+    ждут ее CACHE_LOCK_WAIT секунд.
+    Без пула потоков (см. core.jobs.pool_enabled) страница
+    пересобирается сразу в запросе, и отдается новая копия.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.namespaces = set(settings.PAGE_CACHE_NAMESPACES)
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+        key = page_cache_key(request)
+        cached = cache.get_many([key, GENERATION_KEY])
+        generation = cached.get(GENERATION_KEY)
+        entry = cached.get(key)
+        if entry is None:
+            if acquire(key):
+                return self.build(key, request, generation)
+            entry = wait_for(key)
+            if entry is None:
+                return self.get_response(request)
+        response, fresh_until, built = entry
+        if time.time() >= fresh_until or built != generation:
+            response = self.revalidate(key, request, generation) or response
+
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            response=response,
+        )
+
+    def is_cacheable_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+
+        return match.namespace in self.namespaces
+
+    def is_cacheable_response(self, request, response):
+        """
+        В кэш попадают только страницы 200 без установки cookie
+        и без CSRF-токена, которые не запрещают кэширование.
+        """
+        cache_control = response.get('Cache-Control', '')
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+            and 'private' not in cache_control
+            and 'no-store' not in cache_control
+        )
+
+    def store(self, key, request, response, generation):
+        if not self.is_cacheable_response(request, response):
+            return
+        fresh_until = time.time() + settings.PAGE_CACHE_TIMEOUT
+        cache.set(
+            key,
+            (response, fresh_until, generation),
+            settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE,
+        )
+
+    def build(self, key, request, generation):
+        try:
+            response = self.get_response(request)
+            self.store(key, request, response, generation)
+        finally:
+            release(key)
+
+        return response
+
+    def revalidate(self, key, request, generation):
+        """
+        Запускает пересборку устаревшей страницы, если ее еще
+        не пересобирает другой запрос (core.cache.acquire).
+        Возвращает новую страницу, если она собрана в этом запросе.
+        """
+        if not acquire(key):
+            return None
+        if not pool_enabled():
+            return self.build(key, request, generation)
+        refresh = copy.copy(request)
+        refresh.META = request.META.copy()
+        _refresher.submit(self.refresh, key, refresh, generation)
+
+        return None
+
+    def refresh(self, key, request, generation):
+        try:
+            self.build(key, request, generation)
+        except Exception:
+            logger.exception('Не удалось обновить страницу %s', request.path)
+        finally:
+            connections.close_all()
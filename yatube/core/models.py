@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Модель, описывающая поля БД для "Фоновой задачи":
+    name        - Путь к функции задачи,
+    payload     - Аргументы задачи в JSON,
+    status      - Состояние задачи,
+    attempts    - Число сделанных попыток,
+    run_at      - Время, раньше которого задача не выполняется,
+    started_at  - Время начала последней попытки,
+    last_error  - Трейсбек последней ошибки,
+    created     - Дата создания задачи.
+    Для каждого поля добавлены vebose-name.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Задача',
+    )
+    payload = models.TextField(
+        default='{}',
+        verbose_name='Аргументы',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить после',
+    )
+    started_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Начало попытки',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='job_status_run_at_idx',
+            ),
+        )
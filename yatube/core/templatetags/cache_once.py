@@ -0,0 +1,68 @@
+from django import template
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+from django.templatetags.cache import do_cache as parse_cache
+
+from ..cache import get_or_build
+
+FRAGMENTS_CACHE = 'template_fragments'
+
+register = template.Library()
+
+
+class SingleFlightCacheNode(CacheNode):
+    """
+    Узел тега cache, который пересобирает фрагмент через
+    get_or_build: одновременно фрагмент рендерит один запрос.
+    """
+
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise template.TemplateSyntaxError(
+                    f'"cache" tag got a non-integer timeout value: '
+                    f'{expire_time!r}'
+                )
+        if self.cache_name:
+            using = self.cache_name.resolve(context)
+        elif FRAGMENTS_CACHE in settings.CACHES:
+            using = FRAGMENTS_CACHE
+        else:
+            using = DEFAULT_CACHE_ALIAS
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+
+        return get_or_build(
+            key,
+            lambda: self.nodelist.render(context),
+            expire_time,
+            using=using,
+        )
+
+
+@register.tag('cache')
+def do_cache(parser, token):
+    """
+    Тег с синтаксисом стандартного {% cache %} и защитой от
+    одновременной пересборки фрагмента.
+    """
+    node = parse_cache(parser, token)
+
+    return SingleFlightCacheNode(
+        node.nodelist,
+        node.expire_time_var,
+        node.fragment_name,
+        node.vary_on,
+        node.cache_name,
+    )
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import acquire, expires_early, get_or_build, release
+
+
+class GetOrBuildTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+
+    def build(self, value='value', delay=0):
+        def builder():
+            time.sleep(delay)
+            self.builds.append(value)
+            return value
+
+        return builder
+
+    def test_value_cached(self):
+        """Функция тестирует, что значение собирается один раз."""
+        self.assertEqual(get_or_build('key', self.build(), 60), 'value')
+        self.assertEqual(get_or_build('key', self.build('new'), 60), 'value')
+        self.assertEqual(self.builds, ['value'])
+
+    def test_not_cacheable_value(self):
+        """Функция тестирует, что отклоненное значение не кэшируется."""
+        get_or_build('key', self.build(), 60, cacheable=lambda value: False)
+        self.assertIsNone(cache.get('key'))
+
+    def test_concurrent_callers_build_once(self):
+        """
+        Функция тестирует, что при одновременных промахах
+        значение собирает один поток, а остальные его ждут.
+        """
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_build('key', self.build(delay=0.2), 60)
+            ))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self.builds, ['value'])
+
+    def test_previous_value_while_rebuilding(self):
+        """
+        Функция тестирует, что пока значение, истекающее раньше срока,
+        пересобирает другой процесс, остальным отдается прежнее.
+        """
+        cache.set('key', ('old', 10 ** 6, time.time() + 60), 60)
+        self.assertTrue(acquire('key'))
+        self.assertEqual(get_or_build('key', self.build('new'), 60), 'old')
+        release('key')
+        self.assertEqual(get_or_build('key', self.build('new'), 60), 'new')
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_builds_without_storing_after_wait(self):
+        """
+        Функция тестирует, что не дождавшись значения, вызывающий
+        собирает его сам и не перезаписывает кэш.
+        """
+        self.assertTrue(acquire('key'))
+        self.assertEqual(get_or_build('key', self.build(), 60), 'value')
+        self.assertIsNone(cache.get('key'))
+
+    def test_expires_early(self):
+        """Функция тестирует вероятностное раннее истечение."""
+        now = time.time()
+        self.assertTrue(expires_early(1, now - 1, beta=0))
+        self.assertFalse(expires_early(1, now + 60, beta=0))
+        self.assertTrue(expires_early(10 ** 6, now + 60, beta=1000))
+
+    def test_fragment_tag(self):
+        """Функция тестирует тег cache библиотеки cache_once."""
+        template = Template(
+            '{% load cache_once %}{% cache 60 card pk %}{{ text }}'
+            '{% endcache %}'
+        )
+        self.assertEqual(
+            template.render(Context({'pk': 1, 'text': 'first'})), 'first',
+        )
+        self.assertEqual(
+            template.render(Context({'pk': 1, 'text': 'second'})), 'first',
+        )
+        self.assertIsNotNone(
+            cache.get(make_template_fragment_key('card', [1]))
+        )
@@ -0,0 +1,173 @@
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..cache import get_or_build, lock_key
+from ..cache_backends import LocalTier, SQLiteCache, TwoTierCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.directory.name, 'cache.sqlite3')
+        self.cache = self.create()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_values_shared_between_instances(self):
+        """
+        Функция тестирует, что значения видны через другое
+        соединение с тем же файлом, как в другом процессе.
+        """
+        self.cache.set('key', {'value': [1, 2]})
+        self.cache.set_many({'first': 1, 'second': 'two'})
+        other = self.create()
+        self.assertEqual(other.get('key'), {'value': [1, 2]})
+        self.assertEqual(
+            other.get_many(['first', 'second', 'missing']),
+            {'first': 1, 'second': 'two'},
+        )
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expiry_and_add(self):
+        """Функция тестирует истечение значений и семантику add."""
+        self.cache.set('expired', 'value', 0)
+        self.assertIsNone(self.cache.get('expired'))
+        self.assertTrue(self.cache.add('expired', 'new'))
+        self.assertFalse(self.cache.add('expired', 'other'))
+        self.assertEqual(self.cache.get('expired'), 'new')
+        self.assertTrue(self.cache.touch('expired', 0))
+        self.assertFalse(self.cache.has_key('expired'))
+
+    def test_incr_atomic(self):
+        """Функция тестирует, что одновременные incr не теряются."""
+        self.cache.set('counter', 0)
+        threads = [
+            threading.Thread(target=lambda: [
+                self.cache.incr('counter') for _ in range(100)
+            ])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 400)
+        self.assertEqual(self.cache.decr('counter', 10), 390)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('text', 'value')
+        with self.assertRaises(ValueError):
+            self.cache.incr('text')
+
+    def test_lru_eviction(self):
+        """
+        Функция тестирует, что при переполнении удаляются
+        давно не читанные записи.
+        """
+        cache = self.create(
+            MAX_ENTRIES=10, CULL_FREQUENCY=5, CULL_INTERVAL=1,
+            TOUCH_INTERVAL=0,
+        )
+        for index in range(10):
+            cache.set(f'key{index}', index)
+        time.sleep(0.01)
+        cache.get('key0')
+        cache.set('key10', 10)
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertFalse(cache.has_key('key1'))
+        self.assertFalse(cache.has_key('key3'))
+        self.assertTrue(cache.has_key('key4'))
+        self.assertTrue(cache.has_key('key10'))
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = self.create()
+        self.cache.clear()
+
+    def create(self, **options):
+        """Кэш с отдельным L1, как в другом процессе."""
+        cache = TwoTierCache('shared', {'OPTIONS': {
+            'STAMP_INTERVAL': 0, 'STATS_INTERVAL': 3600, **options,
+        }})
+        cache._tier = LocalTier()
+        return cache
+
+    def test_hits_counted_by_tier(self):
+        """Функция тестирует попадания в L1 и L2 и их учет."""
+        other = self.create()
+        self.cache.set('key', 'value')
+        self.assertEqual(other.get('key'), 'value')
+        self.assertEqual(other.get_many(['key', 'missing']), {'key': 'value'})
+        other.flush_stats()
+        stats = self.cache.stats()
+        self.assertEqual(
+            (stats['l1_hits'], stats['l2_hits'], stats['misses']), (1, 1, 1),
+        )
+        self.assertAlmostEqual(stats['l1_ratio'], 1 / 3)
+
+    def test_l1_served_without_l2(self):
+        """Функция тестирует, что значение из L1 не читается из L2."""
+        self.cache.set('key', 'value')
+        caches['shared'].set('key', 'changed')
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_invalidation_reaches_other_processes(self):
+        """
+        Функция тестирует, что удаление и incr в одном процессе
+        сбрасывают L1 других процессов.
+        """
+        other = self.create()
+        self.cache.set_many({'card': 'old card', 'version': 1})
+        self.assertEqual(other.get_many(['card', 'version']), {
+            'card': 'old card', 'version': 1,
+        })
+        self.cache.incr('version')
+        self.cache.delete('card')
+        self.assertEqual(other.get_many(['card', 'version']), {'version': 2})
+
+    def test_rebuild_keeps_other_processes_l1(self):
+        """
+        Функция тестирует, что блокировки пересборки живут только
+        в L2 и цикл get_or_build не сбрасывает L1 других процессов.
+        """
+        other = self.create()
+        self.cache.set('feed', 'old feed')
+        self.assertEqual(other.get('feed'), 'old feed')
+        with mock.patch('core.cache.caches', {'two_tier': self.cache}):
+            value = get_or_build('card', lambda: 'card', 60, using='two_tier')
+        self.assertEqual(value, 'card')
+        self.assertNotIn(
+            self.cache.make_key(lock_key('card')), self.cache._tier.entries,
+        )
+        caches['shared'].set('feed', 'new feed')
+        self.assertEqual(other.get('feed'), 'old feed')
+
+    def test_l1_bounded(self):
+        """Функция тестирует вытеснение из L1 по LRU."""
+        cache = self.create(L1_MAX_ENTRIES=2)
+        cache.set_many({'first': 1, 'second': 2})
+        cache.get('first')
+        cache.set('third', 3)
+        self.assertEqual(list(cache._tier.entries), [
+            cache.make_key('first'), cache.make_key('third'),
+        ])
+
+    def test_stats_command(self):
+        """Функция тестирует вывод команды cache_stats."""
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn('default', out.getvalue())
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.db.utils import ConnectionHandler
+from django.test import TestCase, override_settings
+
+from .. import db
+from ..db import checkpoint
+
+
+class SQLitePragmasTests(TestCase):
+    def test_pragmas_applied(self):
+        """
+        Функция тестирует применение профиля PRAGMA
+        к соединению с базой.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+        self.assertEqual(synchronous, 1)
+        self.assertEqual(busy_timeout, 5000)
+
+    @override_settings(SQLITE_CHECKPOINT_INTERVAL=60)
+    def test_periodic_checkpoint(self):
+        """
+        Функция тестирует, что по окончании запросов checkpoint
+        выполняется не чаще раза в SQLITE_CHECKPOINT_INTERVAL секунд.
+        """
+        clock = iter((10, 30, 59, 61, 100, 120, 125))
+        fired = []
+
+        def record():
+            fired.append(db._last_checkpoint)
+
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+        with mock.patch.object(db, '_last_checkpoint', 0), \
+                mock.patch.object(db.time, 'monotonic', clock.__next__), \
+                mock.patch.object(db, 'checkpoint', record):
+            for _ in range(7):
+                request_finished.send(sender=None)
+        self.assertEqual(fired, [61, 125])
+
+    def test_checkpoint_truncates_wal(self):
+        """
+        Функция тестирует, что checkpoint переносит журнал WAL
+        файловой базы в основной файл и очищает журнал.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        name = os.path.join(directory, 'wal.sqlite3')
+        handler = ConnectionHandler({
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name},
+        })
+        self.addCleanup(handler.close_all)
+        with handler['default'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('CREATE TABLE pages (body TEXT)')
+            cursor.executemany(
+                'INSERT INTO pages VALUES (%s)',
+                [('x' * 1000,)] * 100,
+            )
+        self.assertGreater(os.path.getsize(f'{name}-wal'), 0)
+        with mock.patch.object(db, 'connections', handler):
+            busy, log, moved = checkpoint(mode='TRUNCATE')
+        self.assertEqual(busy, 0)
+        self.assertEqual(moved, log)
+        self.assertEqual(os.path.getsize(f'{name}-wal'), 0)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..jobs import job, run_job, run_pending
+from ..models import Job
+
+User = get_user_model()
+CALLS = []
+
+
+@job
+def record(value, fail=False):
+    CALLS.append(value)
+    if fail:
+        raise ValueError(value)
+
+
+@override_settings(JOBS_WORKERS=0, JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=10)
+class JobsTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_job_runs_once(self):
+        """
+        Функция тестирует сохранение задачи в таблицу
+        и ее однократное выполнение.
+        """
+        queued = record.delay('value')
+        self.assertEqual(queued.name, 'core.tests.test_jobs.record')
+        self.assertEqual(run_pending(), 1)
+        self.assertFalse(run_job(queued.pk))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.DONE)
+        self.assertEqual(queued.attempts, 1)
+        self.assertEqual(CALLS, ['value'])
+
+    def test_job_retried_with_backoff(self):
+        """
+        Функция тестирует повтор упавшей задачи с задержкой
+        и пометку ошибки после последней попытки.
+        """
+        queued = record.delay('broken', fail=True)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.QUEUED)
+        self.assertIn('ValueError', queued.last_error)
+        self.assertGreater(
+            queued.run_at,
+            timezone.now() + timedelta(seconds=5),
+        )
+        self.assertEqual(run_pending(), 0)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            call_command('run_jobs', once=True, workers=0, stdout=StringIO())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.FAILED)
+        self.assertEqual(CALLS, ['broken', 'broken'])
+
+    def test_stale_job_requeued(self):
+        """
+        Функция тестирует повторное выполнение задачи,
+        прерванной во время выполнения.
+        """
+        queued = record.delay('stale')
+        Job.objects.update(
+            status=Job.RUNNING,
+            started_at=timezone.now() - timedelta(days=1),
+            attempts=1,
+        )
+        self.assertEqual(run_pending(), 0)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.QUEUED)
+        self.assertGreater(queued.run_at, timezone.now())
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ['stale'])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.DONE)
+
+    def test_stale_job_fails_after_max_attempts(self):
+        """
+        Функция тестирует, что задача, зависавшая JOBS_MAX_ATTEMPTS
+        раз, помечается как ошибочная и больше не выполняется.
+        """
+        queued = record.delay('crash')
+        Job.objects.update(
+            status=Job.RUNNING,
+            started_at=timezone.now() - timedelta(days=1),
+            attempts=2,
+        )
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(CALLS, [])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.FAILED)
+        self.assertIn('JOBS_TIMEOUT', queued.last_error)
+
+    def test_password_reset_email_queued(self):
+        """
+        Функция тестирует, что письмо восстановления пароля
+        отправляется фоновой задачей, а не в запросе.
+        """
+        User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password',
+        )
+        response = self.client.post(
+            reverse('users:password_reset'),
+            {'email': 'user@example.com'},
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
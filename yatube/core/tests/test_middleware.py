@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(JOBS_WORKERS=0)
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='cached post')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:index')
+
+    def test_anonymous_page_cached(self):
+        """Функция тестирует, что анониму страница отдается из кэша."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertIsNone(response.context)
+        self.assertContains(response, 'cached post')
+
+    def test_session_bypasses_cache(self):
+        """Функция тестирует, что вошедшим пользователям кэш не отдается."""
+        url = reverse('about:author')
+        client = Client()
+        client.force_login(self.user)
+        client.get(url)
+        self.assertIsNotNone(client.get(url).context)
+        self.client.get(url)
+        self.assertIsNone(self.client.get(url).context)
+
+    def test_not_public_pages_skipped(self):
+        """Функция тестирует, что страницы вне разделов не кэшируются."""
+        url = reverse('users:login')
+        self.client.get(url)
+        self.assertIsNotNone(self.client.get(url).context)
+
+    def test_invalidated_page_rebuilt(self):
+        """
+        Функция тестирует, что без пула потоков страница, устаревшая
+        после изменения поста, пересобирается в запросе.
+        """
+        self.client.get(self.url)
+        self.post.text = 'changed post'
+        self.post.save()
+        self.assertContains(self.client.get(self.url), 'changed post')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_stale_page_served_while_refreshing(self):
+        """
+        Функция тестирует, что устаревшая страница отдается сразу,
+        а пересборка запускается в фоне один раз.
+        """
+        self.client.get(self.url)
+        self.post.text = 'changed post'
+        self.post.save()
+        with mock.patch('core.middleware.pool_enabled', return_value=True), \
+                mock.patch('core.middleware._refresher') as refresher:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+        self.assertContains(first, 'cached post')
+        self.assertContains(second, 'cached post')
+        self.assertEqual(refresher.submit.call_count, 1)
+        refresher.submit.call_args[0][0](*refresher.submit.call_args[0][1:])
+        self.assertContains(self.client.get(self.url), 'changed post')
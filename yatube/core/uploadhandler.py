@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Обработчик загрузок, который пишет файл во временный файл на диске
+    и не пишет в него больше settings.FILE_UPLOAD_MAX_SIZE байт.
+    Размер файла при этом считается полностью, чтобы форма могла
+    отклонить слишком большой файл с понятной ошибкой.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start >= settings.FILE_UPLOAD_MAX_SIZE:
+            return None
+        raw_data = raw_data[:settings.FILE_UPLOAD_MAX_SIZE - start]
+
+        return super().receive_data_chunk(raw_data, start)
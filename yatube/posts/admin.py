@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import connection
+from django.db.models.expressions import RawSQL
 
 from .models import Group, Post
+from .search import MATCH_IDS, match_expression
 
 
 @admin.register(Group)
@@ -30,7 +33,8 @@ class PostAdmin(admin.ModelAdmin):
     Класс, описывающий отображаемые поля в админке для модели Post,
     list_display        - список полей для отображения,
     list_editable       - поле, которое редактируется в списке,
-    search_fields       - поле по которому работает поиск,
+    search_fields       - поле по которому работает поиск
+                          (в SQLite через полнотекстовый индекс),
     list_filter         - поле по которому установлена сортировка списка,
     empty_value_display - название по-умолчания для пустых полей.
     """
@@ -52,3 +56,16 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
     )
     empty_value_display = '-пусто-'
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Функция ищет посты через индекс FTS5 вместо LIKE '%q%'
+        по всей таблице, если база данных - SQLite.
+        """
+        match = match_expression(search_term)
+        if not match or connection.vendor != 'sqlite':
+            return super().get_search_results(
+                request, queryset, search_term,
+            )
+
+        return queryset.filter(id__in=RawSQL(MATCH_IDS, [match])), False
@@ -0,0 +1,183 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_build, shared_cache
+from core.middleware import invalidate_pages
+
+from .constants import CARD_BATCH_SIZE, FEED_CACHE_TIMEOUT
+from .models import Post
+
+
+def version_key(*scope):
+    """Ключ версии ленты, например version_key('group', slug)."""
+    return 'feed_version:' + ':'.join(str(part) for part in scope)
+
+
+def new_version():
+    """
+    Начальная версия строится от времени, чтобы после вытеснения
+    ключа версии из кэша не совпасть со старыми страницами.
+    """
+    return int(time.time() * 1000000)
+
+
+def get_versions(keys):
+    """
+    Функция возвращает текущие версии лент одним запросом к кэшу.
+    Версии хранятся только в общем кэше (core.cache.shared_cache):
+    их увеличение не сбрасывает L1 процессов, а страницы с версией
+    в ключе не устаревают и могут жить в L1.
+    """
+    shared = shared_cache()
+    versions = shared.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        shared.set_many(missing, None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def bump_versions(keys, pages=True):
+    """
+    Функция увеличивает версии лент, сбрасывая их страницы в кэше,
+    и помечает устаревшими страницы в кэше анонимных посетителей.
+    pages=False не трогает кэш страниц анонимов: они обновятся
+    через PAGE_CACHE_TIMEOUT секунд.
+    """
+    shared = shared_cache()
+    for key in set(keys):
+        try:
+            shared.incr(key)
+        except ValueError:
+            shared.set(key, new_version(), None)
+    if pages:
+        invalidate_pages()
+
+
+def post_scope_key(post_id):
+    return f'post_scope:{post_id}'
+
+
+def drop_post_cards(post_ids):
+    """
+    Функция удаляет из кэша карточки постов (фрагмент post.html)
+    в обоих вариантах: для страницы группы и остальных лент,
+    и запомненных автора и группу поста (см. post_versions).
+    """
+    keys = []
+    for post_id in post_ids:
+        keys.extend(
+            make_template_fragment_key('post_card', [post_id, in_group])
+            for in_group in ('0', '1')
+        )
+        keys.append(post_scope_key(post_id))
+        if len(keys) >= CARD_BATCH_SIZE:
+            cache.delete_many(keys)
+            keys = []
+    if keys:
+        cache.delete_many(keys)
+
+
+def index_versions(request):
+    return [version_key('posts')]
+
+
+def group_versions(request, slug):
+    return [version_key('group', slug)]
+
+
+def profile_versions(request, username):
+    return [version_key('profile', username)]
+
+
+def follow_versions(request):
+    return [version_key('posts'), version_key('follow', request.user.pk)]
+
+
+def post_versions(request, post_id):
+    """
+    Версии страницы поста: сам пост, профиль автора (число его постов)
+    и группа поста. Автор и группа поста запоминаются в кэше,
+    чтобы ответ 304 не читал базу.
+    """
+    key = post_scope_key(post_id)
+    scope = cache.get(key)
+    if scope is None:
+        scope = Post.objects.filter(pk=post_id).values_list(
+            'author__username', 'group__slug',
+        ).first()
+        if scope is None:
+            return [version_key('post', post_id)]
+        cache.set(key, scope, FEED_CACHE_TIMEOUT)
+    username, slug = scope
+    keys = [version_key('post', post_id), version_key('profile', username)]
+    if slug:
+        keys.append(version_key('group', slug))
+
+    return keys
+
+
+def feed_etag(feed_versions):
+    """
+    Функция строит etag_func для декоратора condition: ETag меняется
+    вместе с версиями лент, поэтому клиент получает 304 без чтения
+    постов из базы, пока лента не изменилась. Вошедшим пользователям
+    страницы выводят формы с CSRF-токеном, поэтому в ETag входит
+    и cookie CSRF: после повторного входа токен меняется,
+    и закэшированная браузером форма со старым токеном не отдается.
+    Без cookie CSRF вошедшему пользователю ETag не выдается.
+    """
+    def etag(request, *args, **kwargs):
+        csrf = ''
+        if request.user.is_authenticated:
+            csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+            if not csrf:
+                return None
+        versions = get_versions(feed_versions(request, **kwargs))
+
+        return hashlib.md5(
+            f'{request.get_full_path()}:{request.user.pk or 0}:{csrf}:'
+            f'{versions}'.encode()
+        ).hexdigest()
+
+    return etag
+
+
+def cache_feed(feed_versions):
+    """
+    Декоратор кэширует страницу ленты для GET-запросов.
+    Ключ страницы включает версии лент, которые возвращает
+    feed_versions(request, **kwargs), пользователя и полный url,
+    поэтому после изменения постов страница собирается заново
+    без ожидания истечения таймаута. Одновременные запросы одной
+    страницы собирает один из них (core.cache.get_or_build).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            versions = get_versions(feed_versions(request, **kwargs))
+            digest = hashlib.md5(
+                f'{request.get_full_path()}:{versions}'.encode()
+            ).hexdigest()
+            page_key = (
+                f'feed_page:{view.__name__}:{request.user.pk or 0}:{digest}'
+            )
+
+            return get_or_build(
+                page_key,
+                lambda: view(request, *args, **kwargs),
+                FEED_CACHE_TIMEOUT,
+                cacheable=lambda response: response.status_code == 200,
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,145 @@
+from django.db.models import F
+from django.db.models.functions import Substr
+
+from .constants import CARD_TEXT_LENGTH
+from .models import Post
+from .storage import post_images
+from .utils import page_nav
+
+CARD_COLUMNS = {
+    'card_text': Substr('text', 1, CARD_TEXT_LENGTH + 1),
+    'username': F('author__username'),
+    'first_name': F('author__first_name'),
+    'last_name': F('author__last_name'),
+    'group_slug': F('group__slug'),
+}
+
+
+class CardImage:
+    """Картинка карточки: имя файла в хранилище картинок постов."""
+
+    __slots__ = ('name',)
+    storage = post_images
+
+    def __init__(self, name):
+        self.name = name
+
+    def __bool__(self):
+        return bool(self.name)
+
+    @property
+    def url(self):
+        return self.storage.url(self.name)
+
+
+class CardAuthor:
+    __slots__ = ('username', 'first_name', 'last_name')
+
+    def __init__(self, username, first_name, last_name):
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def __str__(self):
+        return self.username
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+class CardGroup:
+    __slots__ = ('slug',)
+
+    def __init__(self, slug):
+        self.slug = slug
+
+
+class PostCard:
+    """
+    Пост для карточки в ленте: только поля, которые выводит
+    шаблон карточки, текст обрезан в базе. Равна постам и карточкам
+    с тем же id, Post.__eq__ передает такое сравнение карточке.
+    """
+
+    __slots__ = ('id', 'pub_date', 'text', 'image', 'author', 'group')
+
+    def __init__(self, id, pub_date, text, image, author, group):
+        self.id = id
+        self.pub_date = pub_date
+        self.text = text
+        self.image = image
+        self.author = author
+        self.group = group
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if not isinstance(other, (PostCard, Post)):
+            return NotImplemented
+        return self.id == other.pk
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'<PostCard: {self.id}>'
+
+
+def card_rows(posts):
+    """
+    Функция превращает queryset постов в выборку values() только
+    с колонками карточки: текст обрезается до CARD_TEXT_LENGTH + 1
+    символа, чтобы фильтр card_text в шаблоне поставил многоточие,
+    от автора и группы берутся имена и slug.
+    """
+    return posts.values('id', 'pub_date', 'image', **CARD_COLUMNS)
+
+
+def post_cards(rows):
+    """
+    Функция собирает из строк card_rows карточки постов.
+    Одинаковые авторы и группы страницы - общие объекты.
+    """
+    authors = {}
+    groups = {}
+    cards = []
+    for row in rows:
+        author = authors.get(row['username'])
+        if author is None:
+            author = authors[row['username']] = CardAuthor(
+                row['username'], row['first_name'], row['last_name'],
+            )
+        group = None
+        if row['group_slug'] is not None:
+            group = groups.get(row['group_slug'])
+            if group is None:
+                group = groups[row['group_slug']] = CardGroup(
+                    row['group_slug']
+                )
+        cards.append(PostCard(
+            row['id'],
+            row['pub_date'],
+            row['card_text'],
+            CardImage(row['image']),
+            author,
+            group,
+        ))
+
+    return cards
+
+
+def as_cards(page_obj):
+    """Функция заменяет строки card_rows страницы на карточки постов."""
+    page_obj.object_list = post_cards(page_obj.object_list)
+
+    return page_obj
+
+
+def card_page(request, posts):
+    """
+    Функция возвращает страницу карточек постов queryset posts
+    по курсору.
+    """
+    return as_cards(page_nav(request, card_rows(posts)))
@@ -1,3 +1,26 @@
 POST_COUNT = 10
+COMMENT_COUNT = 20
+COMMENT_ORDERING = ('created', 'id')
+FEED_ORDERING = ('-pub_date', '-id')
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+TIMELINE_BATCH_SIZE = 500
+AUTHOR_RECENT_POSTS = 100
+AUTHOR_RECENT_POSTS_TIMEOUT = 60 * 60
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+CARD_BATCH_SIZE = 500
+CARD_TEXT_LENGTH = 500
+COUNTERS_BATCH_SIZE = 500
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': '28%', 'upscale': True}),
+}
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_FORMATS = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+}
+POST_IMAGE_SIZES = '(min-width: 768px) 66vw, 100vw'
+POST_IMAGES_DIR = 'posts'
+IMAGE_GC_GRACE = 60 * 60
+IMAGE_GC_BATCH_SIZE = 500
 TEST_POST_COUNT = 19
 TEST_TEXT_COUNT = 15
@@ -0,0 +1,80 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .constants import COUNTERS_BATCH_SIZE
+from .models import AuthorCounters, Comment, Follow, Group, Post, User
+
+
+def count_of(queryset, field):
+    """Подзапрос числа записей queryset, связанных с внешней строкой."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def increment(queryset, **deltas):
+    """
+    Функция атомарно меняет счетчики в базе выражениями F(),
+    не опуская их ниже нуля. Возвращает число обновленных строк.
+    """
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def change_author_counters(user_id, **deltas):
+    """
+    Функция меняет счетчики пользователя. Если строки счетчиков нет,
+    при увеличении они пересчитываются, при уменьшении (например,
+    при каскадном удалении пользователя) ничего не делается.
+    """
+    updated = increment(AuthorCounters.objects.filter(user=user_id), **deltas)
+    if not updated and max(deltas.values()) > 0:
+        recount_authors(User.objects.filter(pk=user_id))
+
+
+def change_group_posts(group_id, delta):
+    if group_id:
+        increment(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+def change_post_comments(post_id, delta):
+    increment(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def recount_authors(users):
+    """Функция пересчитывает счетчики пользователей по данным в базе."""
+    AuthorCounters.objects.bulk_create(
+        [AuthorCounters(user_id=user_id) for user_id in users.exclude(
+            counters__isnull=False,
+        ).values_list('pk', flat=True)],
+        batch_size=COUNTERS_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return AuthorCounters.objects.filter(user__in=users).update(
+        posts_count=count_of(Post.objects.all(), 'author'),
+        followers_count=count_of(Follow.objects.all(), 'author'),
+        following_count=count_of(Follow.objects.all(), 'user'),
+    )
+
+
+def recount_counters():
+    """
+    Функция пересчитывает все денормализованные счетчики.
+    Возвращает число обновленных пользователей, групп и постов.
+    """
+    return (
+        recount_authors(User.objects.all()),
+        Group.objects.update(
+            posts_count=count_of(Post.objects.all(), 'group'),
+        ),
+        Post.objects.update(
+            comments_count=count_of(Comment.objects.all(), 'post'),
+        ),
+    )
@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
 from .models import Comment, Post
 
@@ -17,6 +19,42 @@ class PostForm(forms.ModelForm):
             'image': 'Картинка публикации',
         }
 
+    def clean_image(self):
+        """
+        Функция отклоняет картинки больше settings.POST_IMAGE_MAX_PIXELS.
+        Размер берется из заголовка файла, картинка не декодируется.
+        """
+        image = self.cleaned_data['image']
+        if not image or not hasattr(image, 'image'):
+            return image
+        width, height = image.image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Картинка не должна быть больше %(pixels)s мегапикселей.',
+                params={'pixels': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+            )
+
+        return image
+
+    def clean(self):
+        """
+        Функция отклоняет файлы больше settings.FILE_UPLOAD_MAX_SIZE.
+        Обработчик загрузки не записывает их целиком, поэтому ошибка
+        разбора картинки заменяется ошибкой размера.
+        """
+        cleaned_data = super().clean()
+        upload = self.files.get('image')
+        if upload is not None and upload.size > settings.FILE_UPLOAD_MAX_SIZE:
+            self.errors.pop('image', None)
+            self.add_error('image', forms.ValidationError(
+                'Размер картинки не должен превышать %(size)s.',
+                params={
+                    'size': filesizeformat(settings.FILE_UPLOAD_MAX_SIZE),
+                },
+            ))
+
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,104 @@
+import os
+import time
+
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.engines.pil_engine import Engine
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import job
+
+from .constants import IMAGE_GC_BATCH_SIZE, IMAGE_GC_GRACE, POST_IMAGES_DIR
+from .models import Post
+
+
+class DraftEngine(Engine):
+    """
+    Движок sorl-thumbnail, который читает картинку из хранилища
+    потоком, без копии файла в памяти, и декодирует JPEG сразу
+    в уменьшенном в 2-8 раз виде (draft), если миниатюра меньше.
+    """
+
+    def get_image(self, source):
+        return Image.open(source.storage.open(source.name))
+
+    def create(self, image, geometry, options):
+        if image.format == 'JPEG':
+            side = max(geometry)
+            image.draft(image.mode, (side, side))
+
+        return super().create(image, geometry, options)
+
+    def cleanup(self, image):
+        if getattr(image, 'fp', None) is not None:
+            image.fp.close()
+
+
+def image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def stored_images(directory=POST_IMAGES_DIR):
+    """Функция перечисляет все файлы в каталоге картинок постов."""
+    storage = image_storage()
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield f'{directory}/{name}'
+    for subdirectory in directories:
+        yield from stored_images(f'{directory}/{subdirectory}')
+
+
+def referenced_images(names):
+    """Функция возвращает имена картинок, на которые ссылаются посты."""
+    names = list(names)
+    referenced = set()
+    for start in range(0, len(names), IMAGE_GC_BATCH_SIZE):
+        referenced.update(Post.objects.filter(
+            image__in=names[start:start + IMAGE_GC_BATCH_SIZE],
+        ).values_list('image', flat=True))
+
+    return referenced
+
+
+def collect_images(names=None, grace=IMAGE_GC_GRACE, dry_run=False):
+    """
+    Функция удаляет картинки, на которые не ссылается ни один пост,
+    вместе с их миниатюрами. Одна картинка хранится для всех постов
+    с тем же содержимым, поэтому файл удаляется, только когда число
+    ссылок на него падает до нуля. Файлы, записанные или повторно
+    загруженные за последние grace секунд, не трогаются: пост с ними
+    может быть еще не сохранен. Без names проверяются все файлы
+    каталога картинок. Возвращает список удаленных имен.
+    """
+    storage = image_storage()
+    if names is None:
+        names = stored_images()
+    names = list(names)
+    referenced = referenced_images(names)
+    deadline = time.time() - grace
+    removed = []
+    for name in names:
+        if not name or name in referenced:
+            continue
+        try:
+            if os.path.getmtime(storage.path(name)) > deadline:
+                continue
+        except FileNotFoundError:
+            pass
+        if not dry_run:
+            default.kvstore.delete(ImageFile(name, storage))
+            storage.delete(name)
+        removed.append(name)
+
+    return removed
+
+
+@job
+def release_images(names):
+    """
+    Фоновая задача, освобождающая картинки после удаления поста
+    или замены картинки, если на них больше никто не ссылается.
+    """
+    collect_images(names)
@@ -0,0 +1,96 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.cards import card_rows, post_cards
+from posts.constants import POST_COUNT
+from posts.models import Group, Post, User
+from posts.utils import CursorPaginator
+
+STRATEGIES = {
+    'models': lambda: list(CursorPaginator(
+        Post.objects.select_related('group', 'author'), POST_COUNT,
+    ).first_page()),
+    'cards': lambda: post_cards(CursorPaginator(
+        card_rows(Post.objects.all()), POST_COUNT,
+    ).first_page()),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает страницу ленты из моделей Post с автором и группой '
+        'и из проекции карточек: время и пик памяти на страницу. '
+        'Работает на временной тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--text', type=int, default=5000)
+        parser.add_argument('--reads', type=int, default=500)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        User.objects.bulk_create(
+            User(
+                username=f'bench_{index}',
+                first_name='Имя',
+                last_name='Фамилия',
+                password='pbkdf2_sha256$' + 'x' * 80,
+            )
+            for index in range(20)
+        )
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {index}',
+                slug=f'bench-{index}',
+                description='описание ' * 100,
+            )
+            for index in range(5)
+        )
+        author_ids = list(User.objects.values_list('id', flat=True))
+        group_ids = list(Group.objects.values_list('id', flat=True))
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author_id=author_ids[index % len(author_ids)],
+                    group_id=group_ids[index % len(group_ids)],
+                    text='x' * options['text'],
+                )
+                for index in range(options['posts'])
+            ),
+            batch_size=500,
+        )
+        self.stdout.write(
+            f'{"strategy":<10}{"p50 ms":>10}{"p95 ms":>10}{"peak KiB":>10}'
+        )
+        for name, read_page in STRATEGIES.items():
+            read_page()
+            timings = []
+            for _ in range(options['reads']):
+                started = time.perf_counter()
+                read_page()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            tracemalloc.start()
+            read_page()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f'{name:<10}{statistics.median(timings):>10.3f}'
+                f'{p95:>10.3f}{peak / 1024:>10.1f}'
+            )
@@ -0,0 +1,108 @@
+import random
+import statistics
+import sys
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts.constants import POST_COUNT
+from posts.counters import recount_authors
+from posts.models import Follow, Post, Timeline, User
+from posts.timeline import HybridTimelinePaginator
+
+DISTRIBUTIONS = {
+    'uniform': lambda index, users: users // 10,
+    'zipf': lambda index, users: users // (index + 1),
+    'celebrity': lambda index, users: users if index == 0 else users // 100,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ленту подписок только на записи (push) и гибридную '
+        'ленту (push/pull): число записей в ленты на один пост и время '
+        'чтения первой страницы при разных распределениях подписчиков. '
+        'Работает на временной тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--authors', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=5)
+        parser.add_argument('--threshold', type=int, default=500)
+        parser.add_argument('--reads', type=int, default=200)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        random.seed(0)
+        User.objects.bulk_create(
+            User(username=f'bench_{index}')
+            for index in range(options['users'] + options['authors'])
+        )
+        user_ids = list(User.objects.values_list('id', flat=True))
+        author_ids = user_ids[:options['authors']]
+        reader_ids = user_ids[options['authors']:]
+        readers = list(User.objects.filter(
+            id__in=random.sample(reader_ids, options['reads']),
+        ))
+        self.stdout.write(
+            f'{"distribution":<14}{"strategy":<10}{"writes/post":>12}'
+            f'{"create ms":>12}{"read p50 ms":>13}{"read p95 ms":>13}'
+        )
+        for name, followers in DISTRIBUTIONS.items():
+            follows = [
+                Follow(user_id=user_id, author_id=author_id)
+                for index, author_id in enumerate(author_ids)
+                for user_id in random.sample(
+                    reader_ids, followers(index, len(reader_ids)),
+                )
+            ]
+            strategies = (
+                ('push', sys.maxsize),
+                ('hybrid', options['threshold']),
+            )
+            for strategy, threshold in strategies:
+                with override_settings(FEED_PULL_FOLLOWERS=threshold):
+                    result = self.run_case(
+                        follows, author_ids, readers, options['posts'],
+                    )
+                self.stdout.write(
+                    f'{name:<14}{strategy:<10}{result[0]:>12.1f}'
+                    f'{result[1]:>12.2f}{result[2]:>13.2f}{result[3]:>13.2f}'
+                )
+
+    def run_case(self, follows, author_ids, readers, posts):
+        for model in (Timeline, Post, Follow):
+            model.objects.all()._raw_delete(connection.alias)
+        Follow.objects.bulk_create(follows, batch_size=400)
+        recount_authors(User.objects.all())
+        cache.clear()
+        started = time.perf_counter()
+        for _ in range(posts):
+            for author_id in author_ids:
+                Post.objects.create(author_id=author_id, text='bench')
+        created = len(author_ids) * posts
+        create_ms = (time.perf_counter() - started) * 1000 / created
+        writes = Timeline.objects.count() / created
+        timings = []
+        for user in readers:
+            started = time.perf_counter()
+            list(HybridTimelinePaginator(user, POST_COUNT).first_page())
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+
+        return writes, create_ms, statistics.median(timings), p95
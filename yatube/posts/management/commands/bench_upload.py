@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.constants import POST_THUMBNAILS
+
+STRATEGIES = ('pil', 'draft')
+
+
+def make_jpeg(path, width, height):
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 64).convert('RGB')
+    noise.save(path, 'JPEG', quality=90)
+
+
+def measure(strategy, path):
+    """
+    Выполняется в отдельном процессе: проверяет загрузку как форма
+    и создает миниатюру карточки. Возвращает прирост пикового RSS
+    в МБ и время в мс.
+    """
+    import django
+
+    django.setup()
+    from django import forms
+    from django.core.files.storage import FileSystemStorage
+    from django.core.files.uploadedfile import TemporaryUploadedFile
+    from sorl.thumbnail.base import ThumbnailBackend
+    from sorl.thumbnail.conf import settings as sorl_settings
+    from sorl.thumbnail.engines.pil_engine import Engine
+    from sorl.thumbnail.images import ImageFile
+    from sorl.thumbnail.parsers import parse_geometry
+
+    from posts.images import DraftEngine
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    upload = TemporaryUploadedFile(
+        'bench.jpg', 'image/jpeg', os.path.getsize(path), None,
+    )
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(64 * 1024), b''):
+            upload.write(chunk)
+    upload.seek(0)
+    forms.ImageField().clean(upload)
+    engine = DraftEngine() if strategy == 'draft' else Engine()
+    storage = FileSystemStorage(os.path.dirname(path))
+    image = engine.get_image(
+        ImageFile(os.path.basename(path), storage)
+    )
+    geometry, options = POST_THUMBNAILS['card']
+    options = {
+        **ThumbnailBackend.default_options,
+        'orientation': sorl_settings.THUMBNAIL_ORIENTATION,
+        'blur': sorl_settings.THUMBNAIL_BLUR,
+        **options,
+    }
+    thumbnail = engine.create(
+        image, parse_geometry(geometry, image.size[0] / image.size[1]),
+        options,
+    )
+    engine._get_raw_data(
+        thumbnail, options['format'], options['quality'], {},
+    )
+    engine.cleanup(image)
+    upload.close()
+    elapsed = (time.perf_counter() - started) * 1000
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return (peak - baseline) / 1024, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет пиковую память и время обработки одной загруженной '
+        'картинки: проверка формой и миниатюра карточки стандартным '
+        'движком sorl и движком с уменьшением JPEG при декодировании. '
+        'Каждый замер выполняется в отдельном процессе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=8000)
+        parser.add_argument('--height', type=int, default=6000)
+        parser.add_argument('--runs', type=int, default=3)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.jpg')
+            with context.Pool(1) as pool:
+                pool.apply(
+                    make_jpeg,
+                    (path, options['width'], options['height']),
+                )
+            size = os.path.getsize(path) / 1024 / 1024
+            self.stdout.write(
+                f'{options["width"]}x{options["height"]} JPEG, '
+                f'{size:.1f} МБ'
+            )
+            self.stdout.write(
+                f'{"engine":<8}{"peak RSS MB":>13}{"time ms":>10}'
+            )
+            for strategy in STRATEGIES:
+                results = []
+                for _ in range(options['runs']):
+                    with context.Pool(1) as pool:
+                        results.append(pool.apply(measure, (strategy, path)))
+                peak = max(memory for memory, _ in results)
+                elapsed = min(elapsed for _, elapsed in results)
+                self.stdout.write(
+                    f'{strategy:<8}{peak:>13.1f}{elapsed:>10.0f}'
+                )
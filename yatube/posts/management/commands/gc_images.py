@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts.constants import IMAGE_GC_GRACE
+from posts.images import collect_images
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые больше не ссылается '
+        'ни один пост, вместе с их миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=IMAGE_GC_GRACE,
+            help='Не удалять файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены.',
+        )
+
+    def handle(self, *args, **options):
+        removed = collect_images(
+            grace=options['grace'],
+            dry_run=options['dry_run'],
+        )
+        for name in removed:
+            self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок без ссылок: {len(removed)}.'
+        ))
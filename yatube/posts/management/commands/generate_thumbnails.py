@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в очередь создание миниатюр для всех постов с картинками, '
+        'например после смены хранилища или размеров миниатюр. '
+        'Готовые миниатюры не пересоздаются.'
+    )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').values_list('id', flat=True)
+        queued = 0
+        with transaction.atomic():
+            for post_id in posts.iterator():
+                generate_thumbnails.delay(post_id)
+                queued += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Поставлено в очередь постов: {queued}.'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts.search import ensure_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересоздает триггеры и перестраивает полнотекстовый индекс '
+        'FTS5 по тексту постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-optimize',
+            action='store_true',
+            help='Не объединять сегменты индекса после перестроения.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Полнотекстовый индекс доступен только в SQLite.'
+            )
+        with transaction.atomic():
+            ensure_search_index(None, using=connection.alias)
+            rebuild_search_index(optimize=not options['no_optimize'])
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен.'))
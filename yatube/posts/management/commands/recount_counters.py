@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счетчики постов, подписчиков '
+        'и подписок пользователей, постов групп и комментариев постов.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users, groups, posts = recount_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счетчики: пользователей - {users}, '
+            f'групп - {groups}, постов - {posts}.'
+        ))
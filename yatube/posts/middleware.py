@@ -0,0 +1,28 @@
+from django.http import HttpResponsePermanentRedirect
+
+from .utils import PageMoved
+
+
+class PageMovedMiddleware:
+    """
+    Отвечает на старые ссылки вида ?page=N постоянным редиректом
+    на ту же страницу по курсору ?after=, чтобы поисковые роботы
+    запоминали ссылки, стоимость которых не зависит от глубины.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, PageMoved):
+            return None
+        query = request.GET.copy()
+        query.pop('page', None)
+        query['after'] = exception.cursor
+
+        return HttpResponsePermanentRedirect(
+            f'{request.path}?{query.urlencode()}'
+        )
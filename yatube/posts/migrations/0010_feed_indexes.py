@@ -0,0 +1,86 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:55
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 500
+
+
+def count_of(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def delete_duplicate_follows(apps, schema_editor):
+    """
+    Удаляет повторные подписки, оставляя самую раннюю,
+    и пересчитывает счетчики подписок затронутых пользователей.
+    """
+    AuthorCounters = apps.get_model('posts', 'AuthorCounters')
+    Follow = apps.get_model('posts', 'Follow')
+    duplicates = Follow.objects.values('user', 'author').annotate(
+        total=Count('id'),
+        first=Min('id'),
+    ).filter(total__gt=1)
+    affected = set()
+    batch = []
+    for duplicate in list(duplicates):
+        affected.update((duplicate['user'], duplicate['author']))
+        batch.extend(
+            Follow.objects.filter(
+                user=duplicate['user'],
+                author=duplicate['author'],
+                id__gt=duplicate['first'],
+            ).values_list('id', flat=True)
+        )
+        if len(batch) >= BATCH_SIZE:
+            Follow.objects.filter(id__in=batch).delete()
+            batch = []
+    if batch:
+        Follow.objects.filter(id__in=batch).delete()
+    if affected:
+        AuthorCounters.objects.filter(user__in=affected).update(
+            followers_count=count_of(Follow.objects.all(), 'author'),
+            following_count=count_of(Follow.objects.all(), 'user'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_feed_idx'),
+        ),
+        migrations.RunPython(
+            delete_duplicate_follows,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
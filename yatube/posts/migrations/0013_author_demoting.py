@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorcounters',
+            name='demoting',
+            field=models.BooleanField(default=False, verbose_name='Раскладка постов по лентам'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import post_images
+
 User = get_user_model()
 
 
@@ -9,7 +11,8 @@ class Group(models.Model):
     Модель, описывающая поля БД для "Группы публикаций":
     title       - Название поста,
     slug        - Формат строки, улучшающий читаемость и seo-оптмизацию,
-    description - Описание поста.
+    description - Описание поста,
+    posts_count - Число постов группы (денормализованный счетчик).
     Для каждого поля добавлены vebose-name.
     """
 
@@ -24,6 +27,10 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание',
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
 
     def __str__(self):
         return self.title
@@ -35,7 +42,9 @@ class Post(models.Model):
     text        - Текст публикации,
     pub_date    - Дата публикации,
     author      - Автор публикации,
-    group       - Группа публикации.
+    group       - Группа публикации,
+    image       - Картинка публикации,
+    comments_count - Число комментариев (денормализованный счетчик).
     Для каждого поля добавлены vebose-name.
     """
 
@@ -63,14 +72,45 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_images,
         blank=True,
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число комментариев',
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    def __eq__(self, other):
+        """
+        С объектами не из моделей сравнение передается другой стороне,
+        как в Django 3.0+: карточка PostCard равна посту с тем же id
+        с обеих сторон сравнения.
+        """
+        if not isinstance(other, models.Model):
+            return NotImplemented
+        return super().__eq__(other)
+
+    __hash__ = models.Model.__hash__
+
     class Meta:
         ordering = '-pub_date',
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx',
+            ),
+        )
 
 
 class Comment(models.Model):
@@ -96,6 +136,14 @@ class Comment(models.Model):
         auto_now_add=True,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
+
 
 class Follow(models.Model):
     """
@@ -113,3 +161,81 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+
+
+class AuthorCounters(models.Model):
+    """
+    Модель, описывающая денормализованные счетчики пользователя:
+    user            - Ссылка на пользователя,
+    posts_count     - Число постов пользователя,
+    followers_count - Число подписчиков пользователя,
+    following_count - Число подписок пользователя на авторов,
+    demoting        - Автор перестал быть популярным, но его посты
+                      еще раскладываются по лентам подписчиков
+                      фоновой задачей и пока подмешиваются при чтении.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок',
+    )
+    demoting = models.BooleanField(
+        default=False,
+        verbose_name='Раскладка постов по лентам',
+    )
+
+
+class Timeline(models.Model):
+    """
+    Модель, описывающая материализованную ленту подписок пользователя,
+    заполняется при публикации поста (fan-out on write):
+    user        - Ссылка на владельца ленты,
+    post        - Ссылка на пост автора, на которого подписан пользователь,
+    pub_date    - Дата публикации поста, копия для сортировки ленты.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_post',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_feed_idx',
+            ),
+        )
@@ -0,0 +1,123 @@
+from django.db import connection
+
+from .models import Post
+from .utils import CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+CREATE_TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert '
+    f'AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    f'END',
+    f'CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete '
+    f'AFTER DELETE ON posts_post BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f'END',
+    f'CREATE TRIGGER IF NOT EXISTS posts_post_fts_update '
+    f'AFTER UPDATE OF text ON posts_post BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    f'END',
+)
+REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+OPTIMIZE = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+DROP = (
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+MATCH_IDS = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    """
+    Обработчик post_migrate: пересоздает триггеры индекса, так как
+    миграции SQLite, пересобирающие таблицу posts_post, их удаляют.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def rebuild_search_index(optimize=True):
+    """Функция перестраивает полнотекстовый индекс по таблице постов."""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD)
+        if optimize:
+            cursor.execute(OPTIMIZE)
+
+
+def match_expression(query):
+    """
+    Функция превращает пользовательский запрос в выражение MATCH:
+    каждое слово берется в кавычки, последнее ищется по префиксу.
+    """
+    words = [
+        '"{}"'.format(word.replace('"', '""')) for word in query.split()
+    ]
+    if words:
+        words[-1] += '*'
+
+    return ' '.join(words)
+
+
+class SearchPaginator(CursorPaginator):
+    """
+    Паджинатор результатов поиска по курсору (rank, id),
+    rank - оценка bm25, чем меньше, тем релевантнее пост.
+    """
+
+    def __init__(self, query, per_page):
+        self.match = match_expression(query)
+        posts = Post.objects.select_related('group', 'author')
+        super().__init__(posts, per_page, ordering=('rank', 'id'))
+        self.object_list = posts
+
+    def _fetch(self, limit, values=None, forward=True, offset=0):
+        if not self.match:
+            return []
+        sql = (
+            f'SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        )
+        params = [self.match]
+        if values is not None:
+            rank, post_id = float(values[0]), int(values[1])
+            operator = '>' if forward else '<'
+            sql += (
+                f' AND (bm25({FTS_TABLE}) {operator} %s OR '
+                f'(bm25({FTS_TABLE}) = %s AND rowid {operator} %s))'
+            )
+            params += [rank, rank, post_id]
+        direction = '' if forward else ' DESC'
+        sql += (
+            f' ORDER BY score{direction}, rowid{direction} '
+            f'LIMIT %s OFFSET %s'
+        )
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            scores = cursor.fetchall()
+        posts = self.object_list.in_bulk([post_id for post_id, _ in scores])
+        rows = []
+        for post_id, score in scores:
+            if post_id in posts:
+                posts[post_id].rank = score
+                rows.append(posts[post_id])
+
+        return rows
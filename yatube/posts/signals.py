@@ -0,0 +1,169 @@
+from django.core.cache import cache
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .cache import bump_versions, drop_post_cards, version_key
+from .counters import (change_author_counters, change_group_posts,
+                       change_post_comments)
+from .images import release_images
+from .models import AuthorCounters, Comment, Follow, Group, Post, User
+from .timeline import (fan_out_post, follow_added, follow_removed,
+                       recent_posts_key)
+
+
+def post_version_keys(post):
+    """Версии лент, на которых показывается пост."""
+    group_ids = {post.group_id, getattr(post, '_previous_group_id', None)}
+    slugs = Group.objects.filter(id__in=group_ids).values_list(
+        'slug',
+        flat=True,
+    )
+
+    return [
+        version_key('posts'),
+        version_key('post', post.pk),
+        version_key('profile', post.author.username),
+        *(version_key('group', slug) for slug in slugs),
+    ]
+
+
+def follow_version_keys(follow):
+    """Версии лент и профилей, затронутых подпиской."""
+    return [
+        version_key('follow', follow.user_id),
+        version_key('profile', follow.user.username),
+        version_key('profile', follow.author.username),
+    ]
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    """
+    Запоминает прежние группу поста, чтобы сбросить и ее ленту,
+    и картинку, чтобы освободить ее после замены.
+    """
+    if instance.pk:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group', 'image',
+            ).first() or (None, '')
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """
+    Новый пост учитывается в счетчиках и попадает в ленты
+    подписчиков автора, при смене группы поста счетчики
+    групп пересчитываются, при замене картинки прежняя освобождается.
+    """
+    if created:
+        change_author_counters(instance.author_id, posts_count=1)
+        change_group_posts(instance.group_id, 1)
+        fan_out_post(instance)
+    else:
+        previous_group_id = getattr(instance, '_previous_group_id', None)
+        if previous_group_id != instance.group_id:
+            change_group_posts(previous_group_id, -1)
+            change_group_posts(instance.group_id, 1)
+        previous_image = getattr(instance, '_previous_image', '')
+        if previous_image and previous_image != instance.image.name:
+            release_images.delay([previous_image])
+        drop_post_cards([instance.pk])
+    bump_versions(post_version_keys(instance))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """
+    Удаленный пост вычитается из счетчиков и убирается
+    из кэша последних постов автора, его картинка освобождается.
+    """
+    change_author_counters(instance.author_id, posts_count=-1)
+    change_group_posts(instance.group_id, -1)
+    cache.delete(recent_posts_key(instance.author_id))
+    if instance.image:
+        release_images.delay([instance.image.name])
+    drop_post_cards([instance.pk])
+    bump_versions(post_version_keys(instance))
+
+
+def comment_version_keys(comment):
+    """
+    Комментарии видны только на странице поста, поэтому сбрасывается
+    только ее версия, а не ленты и не кэш страниц анонимов.
+    """
+    return [version_key('post', comment.post_id)]
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    """Новый комментарий учитывается в счетчике и сбрасывает пост."""
+    if created:
+        change_post_comments(instance.post_id, 1)
+    bump_versions(comment_version_keys(instance), pages=False)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Удаленный комментарий вычитается из счетчика и сбрасывает пост."""
+    change_post_comments(instance.post_id, -1)
+    bump_versions(comment_version_keys(instance), pages=False)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Изменение группы сбрасывает ее ленту и карточки ее постов."""
+    drop_post_cards(instance.posts.values_list('id', flat=True).iterator())
+    bump_versions([version_key('group', instance.slug)])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Новому пользователю создаются счетчики. Изменение пользователя
+    сбрасывает ленты и карточки его постов и страницы постов с его
+    комментариями, обновление только даты входа их не затрагивает.
+    """
+    if created:
+        AuthorCounters.objects.get_or_create(user=instance)
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    drop_post_cards(instance.posts.values_list('id', flat=True).iterator())
+    commented = Comment.objects.filter(author=instance).values_list(
+        'post',
+        flat=True,
+    ).distinct()
+    bump_versions([
+        version_key('posts'),
+        version_key('profile', instance.username),
+        *(version_key('post', post_id) for post_id in commented),
+    ])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """
+    Подписка учитывается в счетчиках,
+    лента дополняется постами автора.
+    """
+    if created:
+        change_author_counters(instance.user_id, following_count=1)
+        change_author_counters(instance.author_id, followers_count=1)
+        follow_added(instance.user_id, instance.author_id)
+    bump_versions(follow_version_keys(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """
+    Отписка вычитается из счетчиков,
+    посты автора удаляются из ленты.
+    """
+    change_author_counters(instance.user_id, following_count=-1)
+    change_author_counters(instance.author_id, followers_count=-1)
+    follow_removed(instance.user_id, instance.author_id)
+    bump_versions(follow_version_keys(instance))
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+TEMP_SUFFIX = '.upload'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором файл сохраняется под SHA-256 своего
+    содержимого: posts/ab/abcdef....jpg. Хэш считается при записи
+    загрузки на диск, одинаковые загрузки хранятся одним файлом
+    и получают одни и те же миниатюры.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=self.path(directory),
+            suffix=TEMP_SUFFIX,
+        )
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(descriptor, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = '/'.join(filter(None, (
+                directory, hexdigest[:2], hexdigest + extension,
+            )))
+            path = self.path(name)
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return name
+
+
+post_images = ContentAddressedStorage()
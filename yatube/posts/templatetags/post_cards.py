@@ -0,0 +1,15 @@
+from django import template
+from django.template.defaultfilters import truncatechars
+
+from ..constants import CARD_TEXT_LENGTH
+
+register = template.Library()
+
+
+@register.filter
+def card_text(text):
+    """
+    Фильтр обрезает текст поста для карточки до CARD_TEXT_LENGTH
+    символов, той же длины, что и выборка card_rows.
+    """
+    return truncatechars(text, CARD_TEXT_LENGTH)
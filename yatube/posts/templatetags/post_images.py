@@ -0,0 +1,48 @@
+from django import template
+
+from ..constants import POST_IMAGE_SIZES, POST_THUMBNAILS
+from ..thumbnails import ready_variants
+
+register = template.Library()
+
+
+def srcset(thumbnails):
+    return ', '.join(
+        f'{thumbnail.url} {width}w' for width, thumbnail in thumbnails
+    )
+
+
+@register.inclusion_tag('posts/includes/picture.html', takes_context=True)
+def post_picture(context, image, size):
+    """
+    Функция выводит картинку поста тегом <picture>: источники
+    в современных форматах и запасной <img> со srcset по ширинам.
+    Варианты берутся из словаря thumbnails, заранее собранного
+    view для всей страницы, иначе ищутся для одной картинки.
+    Пока миниатюры не созданы, выводится заглушка.
+    """
+    geometry, _ = POST_THUMBNAILS[size]
+    width, height = geometry.split('x')
+    picture = {
+        'image': image,
+        'width': width,
+        'height': height,
+        'sizes': POST_IMAGE_SIZES,
+    }
+    if not image:
+        return picture
+    prefetched = context.get('thumbnails') or {}
+    if (image.name, size) in prefetched:
+        ready = dict(prefetched[image.name, size])
+    else:
+        ready = ready_variants(image, size)
+    fallback = ready.pop(None, None)
+    if fallback:
+        picture['src'] = fallback[-1][1].url
+        picture['srcset'] = srcset(fallback)
+        picture['sources'] = [
+            {'type': mime_type, 'srcset': srcset(variants)}
+            for mime_type, variants in ready.items()
+        ]
+
+    return picture
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.template.defaultfilters import truncatechars
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cards import card_rows, post_cards
+from ..constants import CARD_TEXT_LENGTH
+from ..models import Group, Post, User
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой',
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.long_post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='слово ' * CARD_TEXT_LENGTH,
+            image='posts/cat.gif',
+        )
+        cls.short_post = Post.objects.create(
+            author=cls.author,
+            text='короткий пост',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_card_rows_select_card_columns(self):
+        """
+        Функция тестирует, что выборка карточек не читает лишние
+        колонки автора и группы и обрезает текст в базе.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(card_rows(Post.objects.order_by('id')))
+        sql = queries.captured_queries[0]['sql']
+        for column in ('password', 'email', 'description', 'comments_count'):
+            with self.subTest(column=column):
+                self.assertNotIn(column, sql)
+        self.assertEqual(len(rows[0]['card_text']), CARD_TEXT_LENGTH + 1)
+        self.assertEqual(rows[1]['card_text'], 'короткий пост')
+
+    def test_post_cards(self):
+        """
+        Функция тестирует карточки: поля для шаблона, общий автор
+        страницы и сравнение с постами по id.
+        """
+        cards = post_cards(card_rows(Post.objects.order_by('id')))
+        long_card, short_card = cards
+        self.assertEqual(cards, [self.long_post, self.short_post])
+        self.assertEqual([self.long_post, self.short_post], cards)
+        self.assertNotEqual(self.short_post, long_card)
+        self.assertEqual(hash(long_card), hash(self.long_post))
+        self.assertIs(long_card.author, short_card.author)
+        self.assertEqual(long_card.author.get_full_name(), 'Лев Толстой')
+        self.assertEqual(long_card.group.slug, self.group.slug)
+        self.assertIsNone(short_card.group)
+        self.assertTrue(long_card.image)
+        self.assertEqual(long_card.image.url, self.long_post.image.url)
+        self.assertFalse(short_card.image)
+        self.assertEqual(
+            truncatechars(long_card.text, CARD_TEXT_LENGTH),
+            truncatechars(self.long_post.text, CARD_TEXT_LENGTH),
+        )
+
+    def test_card_text_filter(self):
+        """
+        Функция тестирует, что шаблон обрезает текст карточки
+        до CARD_TEXT_LENGTH, как и выборка card_rows.
+        """
+        card = post_cards(card_rows(Post.objects.filter(
+            pk=self.long_post.pk,
+        )))[0]
+        template = Template('{% load post_cards %}{{ text|card_text }}')
+        for text in (card.text, self.long_post.text):
+            with self.subTest(text=text[:10]):
+                rendered = template.render(Context({'text': text}))
+                self.assertEqual(len(rendered), CARD_TEXT_LENGTH)
+                self.assertTrue(rendered.endswith('…'))
+
+    def test_index_renders_cards(self):
+        """
+        Функция тестирует, что главная выводит обрезанный текст
+        и ссылки карточек так же, как по моделям.
+        """
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(
+            response, truncatechars(self.long_post.text, CARD_TEXT_LENGTH),
+        )
+        self.assertContains(
+            response,
+            reverse('posts:group_list', args=(self.group.slug,)),
+        )
+        self.assertContains(response, 'Лев Толстой')
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorCounters, Follow, Group, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hasnoname')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test title',
+            slug='test-slug',
+            description='test description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='test post',
+        )
+
+    def setUp(self):
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def test_counters_follow_views(self):
+        """
+        Функция тестирует обновление счетчиков
+        при создании постов, комментариев и подписок.
+        """
+        self.user_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'test comment'},
+        )
+        self.user_client.post(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        author = AuthorCounters.objects.get(user=self.author)
+        self.assertEqual(
+            (author.posts_count, author.followers_count),
+            (1, 1),
+        )
+        self.assertEqual(
+            AuthorCounters.objects.get(user=self.user).following_count, 1
+        )
+        self.user_client.post(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.post.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        author = AuthorCounters.objects.get(user=self.author)
+        self.assertEqual(
+            (author.posts_count, author.followers_count),
+            (0, 0),
+        )
+
+    def test_recount_counters_command(self):
+        """
+        Функция тестирует восстановление счетчиков командой.
+        """
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.author),
+        ])
+        AuthorCounters.objects.update(posts_count=42)
+        Group.objects.update(posts_count=42)
+        call_command('recount_counters', stdout=StringIO())
+        self.group.refresh_from_db()
+        author = AuthorCounters.objects.get(user=self.author)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            (author.posts_count, author.followers_count),
+            (1, 1),
+        )
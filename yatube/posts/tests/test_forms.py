@@ -85,6 +85,44 @@ class PostFormTests(TestCase):
             # Не знаю, что с этим сделать......
             # self.assertEqual(form_data['image'], post.image)
 
+    def test_image_limits(self):
+        """
+        Функция тестирует отклонение картинок больше лимитов
+        по числу пикселей и по размеру файла.
+        """
+        pic = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        limits = {
+            'POST_IMAGE_MAX_PIXELS': 1,
+            'FILE_UPLOAD_MAX_SIZE': 20,
+        }
+        posts_count = Post.objects.count()
+        for setting, limit in limits.items():
+            with self.subTest(setting=setting):
+                with self.settings(**{setting: limit}):
+                    response = self.author_client.post(
+                        reverse('posts:post_create'),
+                        data={
+                            'text': 'test post',
+                            'image': SimpleUploadedFile(
+                                'pic.gif', pic, 'image/gif',
+                            ),
+                        },
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    'больше' if setting == 'POST_IMAGE_MAX_PIXELS'
+                    else 'превышать',
+                    response.context['form'].errors['image'][0],
+                )
+        self.assertEqual(Post.objects.count(), posts_count)
+
     def test_edit_post(self):
         """
         Функция тестирует изменение поста с post_id в базе данных
@@ -139,6 +177,52 @@ class PostFormTests(TestCase):
             self.assertEqual(self.user, comment.author)
             self.assertEqual(self.post.id, comment.post.id)
 
+    def test_comment_response_negotiation(self):
+        """
+        Функция тестирует ответы на отправку комментария:
+        JSON по заголовку Accept, фрагмент для XMLHttpRequest
+        и перенаправление для обычной формы.
+        """
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        response = self.user_client.post(
+            url, {'text': 'json comment'}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['text'], 'json comment')
+        self.assertEqual(response.json()['author'], self.user.username)
+        response = self.user_client.post(
+            url,
+            {'text': 'xhr comment'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'posts/includes/comment.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, 'xhr comment', status_code=201)
+        response = self.user_client.post(url, {'text': 'form comment'})
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        self.assertEqual(
+            self.post.comments.filter(text__endswith='comment').count(), 3,
+        )
+
+    def test_invalid_comment_errors(self):
+        """Функция тестирует ошибки пустого комментария в JSON и HTML."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        response = self.user_client.post(
+            url, {'text': ''}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        response = self.user_client.post(
+            url, {'text': ''}, HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTemplateUsed(response, 'includes/form_errors.html')
+        self.assertFalse(self.post.comments.exists())
+
     def test_guest_user_cant_post_comment(self):
         """
         Функция тестирует отправку комментариев
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import SearchPaginator, match_expression
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.author, text=f'кошка номер {index}')
+            for index in range(12)
+        )
+        cls.other = Post.objects.create(
+            author=cls.author,
+            text='собака и кошка, кошка и собака',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_match_expression(self):
+        """Функция тестирует построение выражения MATCH из запроса."""
+        self.assertEqual(match_expression('  '), '')
+        self.assertEqual(
+            match_expression('кот "рыжий'),
+            '"кот" """рыжий"*',
+        )
+
+    def test_search_ranked_and_paginated(self):
+        """
+        Функция тестирует ранжирование результатов и обход
+        всех страниц поиска по курсору.
+        """
+        paginator = SearchPaginator('кошка', 5)
+        page = paginator.first_page()
+        self.assertEqual(page.object_list[0], self.other)
+        found = list(page.object_list)
+        while page.has_next():
+            page = paginator.page_after(page.next_cursor)
+            found.extend(page.object_list)
+        self.assertEqual(len(found), 13)
+        self.assertEqual(len(set(found)), 13)
+        previous = paginator.page_before(page.previous_cursor)
+        self.assertEqual(list(previous.object_list), found[5:10])
+
+    def test_index_follows_post_changes(self):
+        """
+        Функция тестирует синхронизацию индекса триггерами
+        при изменении и удалении поста.
+        """
+        post = self.posts[0]
+        post.text = 'попугай'
+        post.save()
+        page = SearchPaginator('попуг', 10).first_page()
+        self.assertEqual(list(page.object_list), [post])
+        post.delete()
+        page = SearchPaginator('попугай', 10).first_page()
+        self.assertEqual(list(page.object_list), [])
+
+    def test_search_view(self):
+        """Функция тестирует страницу поиска."""
+        url = reverse('posts:search')
+        response = self.guest_client.get(url)
+        self.assertIsNone(response.context['page_obj'])
+        response = self.guest_client.get(url, {'q': 'собака'})
+        self.assertEqual(
+            list(response.context['page_obj'].object_list),
+            [self.other],
+        )
+        response = self.guest_client.get(url, {'q': 'кошка'})
+        self.assertContains(response, '?q=%D0%BA')
+
+    def test_admin_search(self):
+        """Функция тестирует поиск постов в админке через индекс."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password',
+        )
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'},
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            [self.other],
+        )
+
+    def test_rebuild_search_index(self):
+        """Функция тестирует перестроение индекса командой."""
+        call_command('rebuild_search_index', stdout=StringIO())
+        page = SearchPaginator('номер', 20).first_page()
+        self.assertEqual(len(page.object_list), 12)
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.jobs import run_pending
+from core.models import Job
+
+from ..images import collect_images, stored_images
+from ..models import Post, User
+from ..thumbnails import generate_thumbnails, ready_thumbnail
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PIC = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_PIC = PIC.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_WORKERS=0)
+class ImageStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def create_post(self, name, content=PIC):
+        return Post.objects.create(
+            author=self.author,
+            text='test post',
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def test_same_content_stored_once(self):
+        """
+        Функция тестирует, что одинаковые загрузки хранятся одним
+        файлом под хэшем содержимого и делят миниатюры.
+        """
+        first = self.create_post('first.gif')
+        second = self.create_post('second.GIF')
+        other = self.create_post('first.gif', OTHER_PIC)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(
+            first.image.name,
+            r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$',
+        )
+        self.assertEqual(
+            sorted(stored_images()),
+            sorted([first.image.name, other.image.name]),
+        )
+        generate_thumbnails(first.id)
+        self.assertIsNotNone(ready_thumbnail(second.image, 'card'))
+
+    def test_images_released_when_unreferenced(self):
+        """
+        Функция тестирует удаление картинки только после удаления
+        последнего поста, который на нее ссылается.
+        """
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        name = first.image.name
+        generate_thumbnails(first.id)
+        thumbnail = ready_thumbnail(first.image, 'card')
+        first.delete()
+        self.assertEqual(collect_images([name], grace=0), [])
+        second.delete()
+        self.assertEqual(Job.objects.filter(
+            name='posts.images.release_images',
+        ).count(), 2)
+        self.assertEqual(collect_images([name], grace=3600), [])
+        self.assertEqual(collect_images([name], grace=0), [name])
+        self.assertFalse(os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name)))
+        self.assertFalse(thumbnail.exists())
+        self.assertIsNone(ready_thumbnail(second.image, 'card'))
+
+    def test_edit_releases_replaced_image(self):
+        """
+        Функция тестирует освобождение картинки, замененной
+        при редактировании поста, и сборку мусора командой.
+        """
+        post = self.create_post('first.gif')
+        name = post.image.name
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={
+                'text': 'edited post',
+                'image': SimpleUploadedFile('new.gif', OTHER_PIC, 'image/gif'),
+            },
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, name)
+        run_pending()
+        self.assertIn(name, list(stored_images()))
+        output = StringIO()
+        call_command('gc_images', grace=0, stdout=output)
+        self.assertIn(name, output.getvalue())
+        self.assertEqual(list(stored_images()), [post.image.name])
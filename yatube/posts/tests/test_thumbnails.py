@@ -0,0 +1,229 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import run_pending
+from core.models import Job
+
+from ..constants import POST_THUMBNAILS
+from ..images import DraftEngine
+from ..models import Group, Post, User
+from ..thumbnails import (card_thumbnails, generate_thumbnails, image_formats,
+                          prefetch_thumbnails, ready_thumbnail)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PIC = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+PLACEHOLDER = 'aspect-ratio: 960 / 339'
+
+
+def urls(prefetched):
+    return {
+        key: {
+            mime_type: [(width, thumbnail.url) for width, thumbnail in ready]
+            for mime_type, ready in variants.items()
+        }
+        for key, variants in prefetched.items()
+    }
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test title',
+            slug='test-slug',
+            description='test description',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """
+        Функция тестирует, что до создания миниатюры выводится
+        заглушка, а после создания сбрасываются кэши карточки и ленты.
+        """
+        post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text='test post',
+            image=SimpleUploadedFile('pic.gif', PIC, 'image/gif'),
+        )
+        index = self.author_client.get(reverse('posts:index'))
+        self.assertContains(index, PLACEHOLDER)
+        self.assertIsNone(ready_thumbnail(post.image, 'card'))
+        generate_thumbnails(post.id)
+        thumbnail = ready_thumbnail(post.image, 'card')
+        self.assertIsNotNone(thumbnail)
+        index = self.author_client.get(reverse('posts:index'))
+        self.assertNotContains(index, PLACEHOLDER)
+        self.assertContains(index, thumbnail.url)
+        detail = self.author_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertContains(detail, thumbnail.url)
+
+    def test_upload_queues_thumbnails(self):
+        """
+        Функция тестирует постановку создания миниатюр в очередь
+        фоновых задач при загрузке картинки через форму.
+        """
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'test post',
+                'image': SimpleUploadedFile('new.gif', PIC, 'image/gif'),
+            },
+        )
+        post = Post.objects.get(text='test post')
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'edited post'},
+        )
+        queued = Job.objects.get()
+        self.assertEqual(queued.name, 'posts.thumbnails.generate_thumbnails')
+        self.assertEqual(json.loads(queued.payload)['args'], [post.id])
+        self.assertIsNone(ready_thumbnail(post.image, 'card'))
+        run_pending()
+        self.assertIsNotNone(ready_thumbnail(post.image, 'card'))
+
+    def test_picture_variants(self):
+        """
+        Функция тестирует вывод тега <picture> с вариантами
+        миниатюры по ширинам и форматам и ленивой загрузкой.
+        """
+        post = Post.objects.create(
+            author=self.author,
+            text='test post',
+            image=SimpleUploadedFile('variants.gif', PIC, 'image/gif'),
+        )
+        formats = {'PNG': 'image/png', 'UNKNOWN': 'image/unknown'}
+        with mock.patch('posts.thumbnails.POST_IMAGE_FORMATS', formats):
+            self.assertEqual(image_formats(), ['PNG'])
+            generate_thumbnails(post.id)
+            response = self.author_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.id})
+            )
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, '<source type="image/png"')
+        self.assertNotContains(response, 'image/unknown')
+        for width in (320, 640, 960):
+            self.assertContains(response, f'.png {width}w', count=1)
+            self.assertContains(response, f'.jpg {width}w', count=1)
+
+    def test_prefetch_thumbnails(self):
+        """
+        Функция тестирует поиск миниатюр всей страницы одним
+        запросом к базе и использование их в шаблоне ленты.
+        """
+        posts = [
+            Post.objects.create(
+                author=self.author,
+                text=f'test post {index}',
+                image=SimpleUploadedFile(
+                    f'page_{index}.gif',
+                    PIC.replace(b'\xFF\xFF\xFF', bytes((index, 255, 255))),
+                    'image/gif',
+                ),
+            )
+            for index in range(3)
+        ]
+        for post in posts[:2]:
+            generate_thumbnails(post.id)
+        cache.clear()
+        with self.assertNumQueries(1):
+            prefetched = card_thumbnails(posts)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                urls(card_thumbnails(posts)),
+                urls(prefetched),
+            )
+        for post in posts[:2]:
+            ready = prefetched[post.image.name, 'card'][None]
+            self.assertEqual([width for width, _ in ready], [320, 640, 960])
+        self.assertEqual(prefetched[posts[2].image.name, 'card'], {})
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(
+            urls(response.context['thumbnails']),
+            urls(prefetched),
+        )
+        self.assertContains(response, PLACEHOLDER, count=1)
+
+    def test_cached_cards_skip_thumbnail_lookup(self):
+        """
+        Функция тестирует, что миниатюры страницы ищутся только
+        для карточек, которых нет в кэше фрагментов.
+        """
+        post = Post.objects.create(
+            author=self.author,
+            text='test post',
+            image=SimpleUploadedFile('cached.gif', PIC, 'image/gif'),
+        )
+        generate_thumbnails(post.id)
+        cache.clear()
+        with mock.patch(
+            'posts.thumbnails.prefetch_thumbnails',
+            wraps=prefetch_thumbnails,
+        ) as prefetch:
+            self.client.get(reverse('posts:index'))
+            self.assertEqual(prefetch.call_count, 1)
+            Post.objects.create(author=self.author, text='no picture')
+            response = self.client.get(reverse('posts:index'))
+            self.assertEqual(prefetch.call_count, 1)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'no picture')
+
+    def test_draft_decoding(self):
+        """
+        Функция тестирует уменьшение JPEG при декодировании
+        и размер полученной миниатюры.
+        """
+        buffer = BytesIO()
+        Image.new('RGB', (3840, 2160), 'red').save(buffer, 'JPEG')
+        post = Post.objects.create(
+            author=self.author,
+            text='test post',
+            image=SimpleUploadedFile(
+                'large.jpg', buffer.getvalue(), 'image/jpeg',
+            ),
+        )
+        engine = DraftEngine()
+        image = engine.get_image(ImageFile(post.image))
+        thumbnail = engine.create(image, (960, 339), {
+            **ThumbnailBackend.default_options,
+            'orientation': False,
+            'blur': None,
+            **POST_THUMBNAILS['card'][1],
+        })
+        self.assertEqual(image.size, (1920, 1080))
+        self.assertEqual(thumbnail.size, (960, 339))
+        engine.cleanup(image)
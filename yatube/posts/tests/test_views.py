@@ -8,13 +8,20 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..constants import POST_COUNT, TEST_POST_COUNT
-from ..models import Follow, Group, Post, User
+from core.cache import shared_cache
+from core.cache_backends import STAMP_KEY
+from core.jobs import run_pending
+from core.middleware import GENERATION_KEY
+
+from ..cache import post_versions
+from ..constants import COMMENT_COUNT, POST_COUNT, TEST_POST_COUNT
+from ..models import (AuthorCounters, Comment, Follow, Group, Post, Timeline,
+                      User)
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_WORKERS=0)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -144,9 +151,9 @@ class PostPagesTests(TestCase):
             reverse('posts:post_detail', kwargs={'post_id': self.post.id})
         )
         post_context = response.context['post']
-        comment = response.context['comments'].filter(text=comment)
+        comments = [item.text for item in response.context['comments']]
         self.assertEqual(post_context, self.post)
-        self.assertTrue(comment.exists())
+        self.assertIn(comment, comments)
 
     def test_edit_correct_context(self):
         """
@@ -259,7 +266,7 @@ class PostPagesTests(TestCase):
             with self.subTest():
                 self.assertEqual(len(page1_context), POST_COUNT)
             page2_context = self.client.get(
-                (pages) + '?page=2'
+                (pages) + '?page=2', follow=True,
             ).context['page_obj'].object_list
             with self.subTest():
                 self.assertEqual(
@@ -267,6 +274,57 @@ class PostPagesTests(TestCase):
                     TEST_POST_COUNT - POST_COUNT
                 )
 
+    def test_cursor_paginator(self):
+        """
+        Тестирование навигации паджинатора по курсору.
+        """
+        Post.objects.all().delete()
+        Post.objects.bulk_create([
+            Post(
+                text=f'test cursor text {i}',
+                group=self.group,
+                author=self.author,
+            ) for i in range(TEST_POST_COUNT)
+        ])
+        first_page = self.client.get(
+            reverse('posts:index')
+        ).context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+        second_page = self.client.get(
+            reverse('posts:index'),
+            {'after': first_page.next_cursor},
+        ).context['page_obj']
+        self.assertEqual(
+            len(second_page.object_list),
+            TEST_POST_COUNT - POST_COUNT,
+        )
+        self.assertFalse(second_page.has_next())
+        self.assertFalse(
+            set(first_page.object_list) & set(second_page.object_list)
+        )
+        previous_page = self.client.get(
+            reverse('posts:index'),
+            {'before': second_page.previous_cursor},
+        ).context['page_obj']
+        self.assertEqual(previous_page.object_list, first_page.object_list)
+        broken_cursor = self.client.get(
+            reverse('posts:index'),
+            {'after': 'broken'},
+        ).context['page_obj']
+        self.assertEqual(broken_cursor.object_list, first_page.object_list)
+        response = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertRedirects(
+            response,
+            f'{reverse("posts:index")}?after={first_page.next_cursor}',
+            status_code=301,
+        )
+        beyond_last = self.client.get(
+            reverse('posts:index'),
+            {'page': 100},
+        ).context['page_obj']
+        self.assertEqual(beyond_last.object_list, first_page.object_list)
+
     def test_post_with_image(self):
         """
         Функция тестирует отображение поста с картинкой на
@@ -317,7 +375,9 @@ class PostPagesTests(TestCase):
 
     def test_cache(self):
         """
-        Функция тестирует работу кеша на главной странице.
+        Функция тестирует работу кеша на главной странице:
+        изменения в базе в обход моделей не видны до очистки кеша,
+        удаление поста сразу сбрасывает версию страницы.
         """
         test_post = Post.objects.create(
             author=self.author,
@@ -325,12 +385,56 @@ class PostPagesTests(TestCase):
             text='test post cache',
         )
         new_post = self.client.get(reverse('posts:index')).content
-        test_post.delete()
-        new_post_deleted = self.client.get(reverse('posts:index')).content
+        Post.objects.filter(pk=test_post.pk).update(text='test post update')
+        new_post_updated = self.client.get(reverse('posts:index')).content
         cache.clear()
         clear_cache = self.client.get(reverse('posts:index')).content
-        self.assertEqual(new_post, new_post_deleted)
+        self.assertEqual(new_post, new_post_updated)
         self.assertNotEqual(new_post, clear_cache)
+        test_post.delete()
+        new_post_deleted = self.client.get(reverse('posts:index')).content
+        self.assertNotEqual(clear_cache, new_post_deleted)
+
+    def test_post_card_cache(self):
+        """
+        Функция тестирует кеш карточки поста: карточка
+        переиспользуется между лентами и сбрасывается
+        при изменении поста.
+        """
+        self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='test post update')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author.username})
+        )
+        self.assertNotContains(response, 'test post update')
+        self.post.text = 'test post edit'
+        self.post.save()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author.username})
+        )
+        self.assertContains(response, 'test post edit')
+
+    def test_group_cache_reset_on_post_edit(self):
+        """
+        Функция тестирует сброс кеша страниц групп
+        при переносе поста в другую группу.
+        """
+        new_group = Group.objects.create(
+            title='new test title',
+            slug='new-test-slug',
+            description='new description'
+        )
+        group_url = reverse(
+            'posts:group_list',
+            kwargs={'slug': self.group.slug},
+        )
+        self.client.get(group_url)
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': self.post.text, 'group': new_group.id},
+        )
+        response = self.client.get(group_url)
+        self.assertEqual(response.context['page_obj'].object_list, [])
 
     def test_subscribe(self):
         """
@@ -402,3 +506,238 @@ class PostPagesTests(TestCase):
         response = self.user_client.get(reverse('posts:follow_index'))
         page_obj_context = response.context['page_obj'].object_list
         self.assertNotIn(new_post, page_obj_context)
+
+    def test_timeline_backfill_and_trim(self):
+        """
+        Функция тестирует заполнение ленты подписок при подписке
+        и ее очистку при отписке от автора.
+        """
+        self.user_client.post(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertTrue(
+            Timeline.objects.filter(user=self.user, post=self.post).exists()
+        )
+        response = self.user_client.get(reverse('posts:follow_index'))
+        self.assertIn(self.post, response.context['page_obj'].object_list)
+        self.user_client.post(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+
+    @override_settings(FEED_PULL_FOLLOWERS=1)
+    def test_popular_author_posts_pulled_into_feed(self):
+        """
+        Функция тестирует, что посты популярного автора не копируются
+        в ленты подписчиков, а подмешиваются в ленту при чтении.
+        """
+        Follow.objects.create(
+            user=self.user,
+            author=self.author,
+        )
+        new_post = Post.objects.create(
+            author=self.author,
+            text='test popular post',
+        )
+        self.assertFalse(Timeline.objects.filter(post=new_post).exists())
+        response = self.user_client.get(reverse('posts:follow_index'))
+        page_obj_context = response.context['page_obj'].object_list
+        self.assertEqual(page_obj_context, [new_post, self.post])
+
+    @override_settings(FEED_PULL_FOLLOWERS=2, JOBS_WORKERS=0)
+    def test_dropped_author_backfilled_by_job(self):
+        """
+        Функция тестирует, что после отписки, из-за которой автор
+        перестал быть популярным, его посты раскладываются по лентам
+        оставшихся подписчиков фоновой задачей, а не в запросе,
+        и до окончания задачи подмешиваются в ленты при чтении.
+        """
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.filter(user=other).delete()
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+        response = self.user_client.get(reverse('posts:follow_index'))
+        self.assertIn(self.post, response.context['page_obj'].object_list)
+        self.assertEqual(run_pending(), 1)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.user, post=self.post).exists()
+        )
+        self.assertFalse(
+            AuthorCounters.objects.get(user=self.author).demoting
+        )
+
+    def test_pages_not_modified(self):
+        """
+        Функция тестирует, что страницы отвечают 304 на совпавший ETag
+        без запросов к базе и меняют ETag после изменения поста.
+        """
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username},
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        etags = {}
+        for url in urls:
+            with self.subTest(url=url):
+                etags[url] = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etags[url],
+                    )
+                self.assertEqual(response.status_code, 304)
+        self.post.text = 'changed text'
+        self.post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_etag_scoped_to_post(self):
+        """
+        Функция тестирует, что ETag страницы поста меняют посты
+        его автора, но не посты других авторов и групп.
+        """
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        etag = self.client.get(url)['ETag']
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Описание',
+        )
+        Post.objects.create(
+            author=self.user,
+            group=other_group,
+            text='other author post',
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='same author post')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_bumps_only_post_page(self):
+        """
+        Функция тестирует, что комментарий меняет ETag страницы поста,
+        но не ленты, не кэш страниц анонимов и не L1 процессов.
+        """
+        post_url = reverse('posts:post_detail', args=(self.post.id,))
+        urls = {
+            post_url: 200,
+            reverse('posts:index'): 304,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 304,
+            reverse('posts:profile', kwargs={'username': 'author'}): 304,
+        }
+        self.user_client.get(post_url)
+        etags = {url: self.user_client.get(url)['ETag'] for url in urls}
+        generation = cache.get(GENERATION_KEY)
+        stamp = shared_cache().get(STAMP_KEY)
+        Comment.objects.create(post=self.post, author=self.user, text='new')
+        self.assertEqual(cache.get(GENERATION_KEY), generation)
+        self.assertEqual(shared_cache().get(STAMP_KEY), stamp)
+        for url, status in urls.items():
+            with self.subTest(url=url):
+                response = self.user_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url],
+                )
+                self.assertEqual(response.status_code, status)
+
+    def test_post_etag_follows_csrf_token(self):
+        """
+        Функция тестирует, что ETag страницы поста с формой
+        комментария меняется вместе с CSRF-токеном пользователя.
+        """
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        first = self.user_client.get(url)
+        self.assertNotIn('ETag', first)
+        etag = self.user_client.get(url)['ETag']
+        response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.user_client.cookies[settings.CSRF_COOKIE_NAME] = 'rotated'
+        response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.user_client.logout()
+        self.user_client.force_login(self.user)
+        response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comments_paginated(self):
+        """
+        Функция тестирует, что комментарии на странице поста
+        выводятся страницами вместе с авторами, а следующая
+        страница отдается фрагментом.
+        """
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'comment {index}')
+            for index in range(COMMENT_COUNT + 5)
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        post_versions(None, self.post.id)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENT_COUNT)
+        self.assertEqual(comments[0].text, 'comment 0')
+        self.assertContains(response, comments.next_cursor)
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+            {'after': comments.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'comment {index}' for index in range(COMMENT_COUNT, 25)],
+        )
+        self.assertNotContains(response, 'data-fragment')
+
+    def test_cards_partials(self):
+        """
+        Функция тестирует, что ленты отдают порции карточек без
+        base.html со ссылкой на следующую порцию в заголовке Link.
+        """
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'card {index}')
+            for index in range(POST_COUNT)
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        urls = (
+            reverse('posts:index_cards'),
+            reverse('posts:group_cards', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile_cards',
+                kwargs={'username': self.author.username},
+            ),
+            reverse('posts:follow_cards'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.user_client.get(url)
+                self.assertTemplateUsed(
+                    response, 'posts/includes/post_list.html',
+                )
+                self.assertTemplateNotUsed(response, 'base.html')
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), POST_COUNT)
+                self.assertEqual(
+                    response['Link'],
+                    f'<http://testserver{url}?after='
+                    f'{page_obj.next_cursor}>; rel="next"',
+                )
+                self.assertContains(response, f'data-fragment="{url}?after=')
+                response = self.user_client.get(
+                    url, {'after': page_obj.next_cursor},
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']), [self.post],
+                )
+                self.assertFalse(response.has_header('Link'))
@@ -0,0 +1,228 @@
+from django.utils.functional import SimpleLazyObject
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.helpers import serialize, tokey
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDB
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from sorl.thumbnail.parsers import parse_geometry
+
+from core.jobs import job
+
+from .cache import bump_versions, drop_post_cards
+from .constants import POST_IMAGE_FORMATS, POST_IMAGE_WIDTHS, POST_THUMBNAILS
+from .models import Post
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """
+    Бэкенд sorl-thumbnail для картинок постов: понимает форматы,
+    которых нет в sorl (AVIF), и умеет только искать готовую
+    миниатюру в хранилище ключей, не открывая исходную картинку.
+    """
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        key = tokey(source.key, geometry_string, serialize(options))
+        extension = EXTENSIONS.get(options['format'])
+        if extension is None:
+            extension = options['format'].lower()
+
+        return (
+            f'{sorl_settings.THUMBNAIL_PREFIX}'
+            f'{key[:2]}/{key[2:4]}/{key}.{extension}'
+        )
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры с теми же опциями, что у get_thumbnail."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+
+        return ImageFile(name, default.storage)
+
+    def cached_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+
+backend = PostThumbnailBackend()
+
+
+def image_formats():
+    """
+    Функция возвращает современные форматы из POST_IMAGE_FORMATS,
+    которые умеет сохранять установленный Pillow.
+    """
+    Image.init()
+
+    return [format_ for format_ in POST_IMAGE_FORMATS if format_ in Image.SAVE]
+
+
+def variants(size):
+    """
+    Функция перечисляет варианты миниатюры размера из POST_THUMBNAILS:
+    (формат, ширина, геометрия, опции) для всех ширин
+    из POST_IMAGE_WIDTHS, не больших исходной. Формат None -
+    формат sorl по умолчанию, он же запасной для старых браузеров.
+    """
+    geometry, options = POST_THUMBNAILS[size]
+    width, height = parse_geometry(geometry)
+    for format_ in (None, *image_formats()):
+        for variant_width in POST_IMAGE_WIDTHS:
+            if variant_width > width:
+                continue
+            variant_options = dict(options)
+            if format_ is not None:
+                variant_options['format'] = format_
+            variant_height = round(height * variant_width / width)
+            yield (
+                format_,
+                variant_width,
+                f'{variant_width}x{variant_height}',
+                variant_options,
+            )
+
+
+def ready_thumbnail(image, size):
+    """
+    Функция возвращает готовую миниатюру картинки для размера
+    из POST_THUMBNAILS или None, если миниатюра еще не создана.
+    """
+    if not image:
+        return None
+    geometry, options = POST_THUMBNAILS[size]
+
+    return backend.cached_thumbnail(image, geometry, **options)
+
+
+def cached_thumbnails(thumbnails):
+    """
+    Функция одним запросом к кэшу ищет в хранилище ключей sorl
+    готовые миниатюры, отсутствующие в кэше - одним запросом к базе.
+    Как и sorl, запоминает в кэше и отсутствие миниатюры.
+    Возвращает словарь {ключ файла миниатюры: миниатюра}.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDB):
+        found = {}
+        for thumbnail in thumbnails:
+            value = kvstore.get(thumbnail)
+            if value is not None:
+                found[thumbnail.key] = value
+        return found
+    keys = {add_prefix(thumbnail.key): thumbnail.key
+            for thumbnail in thumbnails}
+    values = kvstore.cache.get_many(keys)
+    missing = set(keys) - set(values)
+    if missing:
+        stored = dict(KVStoreModel.objects.filter(
+            key__in=missing,
+        ).values_list('key', 'value'))
+        fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fetched, sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(fetched)
+
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items()
+        if value and value != EMPTY_VALUE
+    }
+
+
+def prefetch_thumbnails(images, size):
+    """
+    Функция заранее находит готовые варианты миниатюр картинок
+    для размера из POST_THUMBNAILS, чтобы страница ленты делала
+    один запрос к хранилищу ключей вместо запроса на каждую картинку.
+    Возвращает словарь {(имя картинки, размер): варианты}, варианты -
+    {MIME-тип: [(ширина, миниатюра), ...]}, запасной формат -
+    под ключом None.
+    """
+    entries = []
+    names = set()
+    for image in images:
+        if not image or image.name in names:
+            continue
+        names.add(image.name)
+        for format_, width, geometry, options in variants(size):
+            entries.append((
+                image.name,
+                format_ and POST_IMAGE_FORMATS[format_],
+                width,
+                backend.thumbnail_file(image, geometry, **options),
+            ))
+    found = cached_thumbnails([thumbnail for *_, thumbnail in entries])
+    prefetched = {}
+    for name, mime_type, width, thumbnail in entries:
+        ready = prefetched.setdefault((name, size), {})
+        if thumbnail.key in found:
+            ready.setdefault(mime_type, []).append(
+                (width, found[thumbnail.key])
+            )
+
+    return prefetched
+
+
+def card_thumbnails(posts):
+    """Функция заранее находит миниатюры карточек страницы постов."""
+    return prefetch_thumbnails((post.image for post in posts or ()), 'card')
+
+
+def page_thumbnails(page_obj):
+    """
+    Функция откладывает поиск миниатюр карточек страницы до первой
+    карточки с картинкой, которой нет в кэше фрагментов. Если все
+    карточки закэшированы, хранилище ключей не запрашивается.
+    """
+    return SimpleLazyObject(lambda: card_thumbnails(page_obj))
+
+
+def ready_variants(image, size):
+    """Функция возвращает готовые варианты миниатюры одной картинки."""
+    return prefetch_thumbnails([image], size).get((image.name, size), {})
+
+
+@job
+def generate_thumbnails(post_id):
+    """
+    Функция создает все варианты миниатюр картинки поста
+    и сбрасывает кэш карточки и лент поста,
+    закэшированных с заглушкой вместо картинки.
+    """
+    from .signals import post_version_keys
+
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    for size, (geometry, options) in POST_THUMBNAILS.items():
+        backend.get_thumbnail(post.image, geometry, **options)
+        for _, _, variant_geometry, variant_options in variants(size):
+            backend.get_thumbnail(
+                post.image, variant_geometry, **variant_options
+            )
+    drop_post_cards([post.pk])
+    bump_versions(post_version_keys(post))
+
+
+def queue_thumbnails(post):
+    """
+    Функция ставит создание миниатюр картинки поста в очередь
+    фоновых задач, чтобы не декодировать картинку во время запроса.
+    """
+    if post.image:
+        generate_thumbnails.delay(post.pk)
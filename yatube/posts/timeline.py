@@ -0,0 +1,244 @@
+import heapq
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from core.jobs import job
+
+from .constants import (AUTHOR_RECENT_POSTS, AUTHOR_RECENT_POSTS_TIMEOUT,
+                        FEED_ORDERING, TIMELINE_BATCH_SIZE, TIMELINE_ORDERING)
+from .models import AuthorCounters, Follow, Post, Timeline
+from .utils import CursorPaginator
+
+
+def recent_posts_key(author_id):
+    return f'author_recent_posts:{author_id}'
+
+
+def is_pulled(author_id):
+    """
+    Функция проверяет, что автор популярный и его посты
+    не раскладываются по лентам, а подмешиваются при чтении.
+    """
+    return AuthorCounters.objects.filter(
+        user=author_id,
+        followers_count__gte=settings.FEED_PULL_FOLLOWERS,
+    ).exists()
+
+
+def pulled_authors(user):
+    """
+    Функция возвращает популярных авторов из подписок пользователя
+    и авторов, чьи посты еще раскладываются по лентам после того,
+    как они перестали быть популярными.
+    """
+    return list(
+        user.follower.filter(
+            Q(author__counters__followers_count__gte=(
+                settings.FEED_PULL_FOLLOWERS
+            ))
+            | Q(author__counters__demoting=True),
+        ).values_list('author', flat=True)
+    )
+
+
+def recent_posts(author_ids):
+    """
+    Функция возвращает из кэша ключи (pub_date, id) последних постов
+    авторов, отсутствующие в кэше списки собирает из базы.
+    """
+    keys = {author_id: recent_posts_key(author_id) for author_id in author_ids}
+    cached = cache.get_many(keys.values())
+    recent = {}
+    missing = {}
+    for author_id, key in keys.items():
+        if key in cached:
+            recent[author_id] = cached[key]
+            continue
+        recent[author_id] = list(
+            Post.objects.filter(author=author_id).order_by(
+                *FEED_ORDERING
+            ).values_list('pub_date', 'id')[:AUTHOR_RECENT_POSTS]
+        )
+        missing[key] = recent[author_id]
+    if missing:
+        cache.set_many(missing, AUTHOR_RECENT_POSTS_TIMEOUT)
+
+    return recent
+
+
+def fan_out_post(post):
+    """
+    Функция раскладывает новый пост в ленты всех подписчиков автора.
+    Посты популярных авторов не раскладываются, а только сбрасывают
+    кэш последних постов автора.
+    """
+    cache.delete(recent_posts_key(post.author_id))
+    if is_pulled(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id,
+    ).values_list('user', flat=True)
+    Timeline.objects.bulk_create(
+        (
+            Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_timeline(user_id, author_id):
+    """
+    Функция дополняет ленту пользователя постами автора,
+    на которого он только что подписался.
+    """
+    posts = Post.objects.filter(
+        author=author_id,
+    ).values_list('id', 'pub_date')
+    Timeline.objects.bulk_create(
+        [
+            Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts.iterator()
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def trim_timeline(user_id, author_id):
+    """
+    Функция удаляет из ленты пользователя посты автора,
+    от которого он отписался.
+    """
+    Timeline.objects.filter(
+        user=user_id,
+        post__author=author_id,
+    ).delete()
+
+
+def follow_added(user_id, author_id):
+    """
+    Функция обновляет ленту после подписки: посты популярного
+    автора подмешиваются при чтении и в ленту не копируются.
+    """
+    if not is_pulled(author_id):
+        backfill_timeline(user_id, author_id)
+
+
+@job
+def backfill_followers(author_id):
+    """
+    Фоновая задача раскладывает посты автора, переставшего быть
+    популярным, по лентам всех его подписчиков и снимает флаг
+    demoting, после чего посты автора больше не подмешиваются
+    при чтении. Если к моменту выполнения автор снова популярен,
+    только снимает флаг.
+    """
+    if not is_pulled(author_id):
+        followers = Follow.objects.filter(
+            author=author_id,
+        ).values_list('user', flat=True)
+        for follower_id in followers.iterator():
+            backfill_timeline(follower_id, author_id)
+    AuthorCounters.objects.filter(user=author_id).update(demoting=False)
+
+
+def follow_removed(user_id, author_id):
+    """
+    Функция обновляет ленты после отписки. Если автор перестал быть
+    популярным, раскладка его постов по лентам оставшихся подписчиков
+    ставится в очередь фоновых задач. До ее окончания автор помечен
+    demoting, и его посты подмешиваются в ленты при чтении, а новые
+    посты уже раскладываются по лентам.
+    """
+    trim_timeline(user_id, author_id)
+    dropped = AuthorCounters.objects.filter(
+        user=author_id,
+        followers_count=settings.FEED_PULL_FOLLOWERS - 1,
+    ).update(demoting=True)
+    if dropped:
+        backfill_followers.delay(author_id)
+
+
+class HybridTimelinePaginator(CursorPaginator):
+    """
+    Паджинатор ленты подписок по гибридной схеме:
+    посты обычных авторов читаются из материализованной ленты (push),
+    посты популярных авторов подмешиваются при чтении из кэша
+    последних постов автора (pull). Источники сливаются k-way merge
+    по ключу (pub_date, id).
+    posts       - queryset постов, по-умолчанию с группой и автором,
+                  может быть и проекцией values() с полями ключа.
+    """
+
+    def __init__(self, user, per_page, posts=None):
+        if posts is None:
+            posts = Post.objects.select_related('group', 'author')
+        super().__init__(posts, per_page)
+        self.entries = user.timeline.all()
+        self.recent = recent_posts(pulled_authors(user))
+
+    def _pulled_keys(self, author_id, window, cursor, forward):
+        """
+        Ключи постов популярного автора для окна выборки.
+        Если окно выходит за пределы кэша, посты читаются из базы.
+        """
+        keys = self.recent[author_id]
+        complete = len(keys) < AUTHOR_RECENT_POSTS
+        if forward:
+            selected = [key for key in keys if cursor is None or key < cursor]
+            if len(selected) >= window or complete:
+                return selected[:window]
+        elif complete or (keys and cursor >= keys[-1]):
+            return [key for key in reversed(keys) if key > cursor][:window]
+        posts = Post.objects.filter(author=author_id)
+        ordering = FEED_ORDERING
+        if cursor is not None:
+            posts = posts.filter(self._seek(cursor, forward))
+        if not forward:
+            ordering = self._reversed_ordering()
+
+        return list(
+            posts.order_by(*ordering).values_list('pub_date', 'id')[:window]
+        )
+
+    def _fetch(self, limit, values=None, forward=True, offset=0):
+        window = offset + limit
+        cursor = None
+        entries = self.entries
+        ordering = TIMELINE_ORDERING
+        if values is not None:
+            cursor = (parse_datetime(values[0]), int(values[1]))
+            entries = entries.filter(
+                self._seek(cursor, forward, TIMELINE_ORDERING)
+            )
+        if not forward:
+            ordering = self._reversed_ordering(TIMELINE_ORDERING)
+        sources = [list(
+            entries.order_by(*ordering).values_list(
+                'pub_date', 'post_id'
+            )[:window]
+        )]
+        sources.extend(
+            self._pulled_keys(author_id, window, cursor, forward)
+            for author_id in self.recent
+        )
+        ids = []
+        seen = set()
+        for _, post_id in heapq.merge(*sources, reverse=forward):
+            if post_id not in seen:
+                seen.add(post_id)
+                ids.append(post_id)
+            if len(ids) == window:
+                break
+        ids = ids[offset:]
+        posts = {
+            self._key(post)[-1]: post
+            for post in self.object_list.filter(id__in=ids)
+        }
+
+        return [posts[post_id] for post_id in ids if post_id in posts]
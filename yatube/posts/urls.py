@@ -10,11 +10,26 @@ urlpatterns = [
         views.index,
         name='index',
     ),
+    path(
+        'cards/',
+        views.index_cards,
+        name='index_cards',
+    ),
     path(
         'group/<slug:slug>/',
         views.group_posts,
         name='group_list',
     ),
+    path(
+        'group/<slug:slug>/cards/',
+        views.group_cards,
+        name='group_cards',
+    ),
+    path(
+        'search/',
+        views.search,
+        name='search',
+    ),
     path(
         'create/',
         views.post_create,
@@ -30,11 +45,21 @@ urlpatterns = [
         views.profile,
         name='profile',
     ),
+    path(
+        'profile/<str:username>/cards/',
+        views.profile_cards,
+        name='profile_cards',
+    ),
     path(
         'posts/<int:post_id>/',
         views.post_detail,
         name='post_detail',
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments',
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -45,6 +70,11 @@ urlpatterns = [
         views.follow_index,
         name='follow_index',
     ),
+    path(
+        'follow/cards/',
+        views.follow_cards,
+        name='follow_cards',
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,15 +1,213 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+
+from .constants import FEED_ORDERING, POST_COUNT
+
+
+def encode_cursor(values):
+    """Кодирует значения ключа сортировки в строку для url."""
+    raw = json.dumps([
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Раскодирует курсор из url в список значений ключа.
+    При испорченном курсоре выбрасывает ValueError.
+    """
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Некорректный курсор')
+    if not isinstance(values, list):
+        raise ValueError('Некорректный курсор')
+
+    return values
+
+
+class PageMoved(Exception):
+    """
+    Страница по старому номеру переехала на адрес по курсору,
+    PageMovedMiddleware отвечает на него постоянным редиректом.
+    """
+
+    def __init__(self, cursor):
+        super().__init__(cursor)
+        self.cursor = cursor
+
+
+class CursorPaginator(Paginator):
+    """
+    Паджинатор по ключу сортировки (keyset pagination).
+    Вместо COUNT(*) и OFFSET страница выбирается условием
+    по ключу (по-умолчанию (pub_date, id)) от последней записи
+    предыдущей страницы, поэтому стоимость страницы не зависит
+    от ее глубины.
+    ordering    - поля ключа, '-' перед полем задает убывание,
+                  последнее поле должно быть уникальным.
+    У страницы появляются атрибуты next_cursor и previous_cursor,
+    number считается относительно курсора, общее число страниц
+    не вычисляется.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    def _key(self, item):
+        if isinstance(item, dict):
+            return [item[field] for field in self.fields]
+        return [getattr(item, field) for field in self.fields]
+
+    def _seek(self, values, forward, ordering=None):
+        """Условие "после курсора" (forward) или "до курсора"."""
+        ordering = ordering or self.ordering
+        fields = [field.lstrip('-') for field in ordering]
+        condition = Q()
+        for index, field in enumerate(ordering):
+            descending = field.startswith('-') == forward
+            lookup = Q(**{
+                f'{fields[index]}__{"lt" if descending else "gt"}': (
+                    values[index]
+                )
+            })
+            for prev_name, value in zip(fields, values[:index]):
+                lookup &= Q(**{prev_name: value})
+            condition |= lookup
+
+        return condition
+
+    def _reversed_ordering(self, ordering=None):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering or self.ordering
+        )
+
+    def _fetch(self, limit, values=None, forward=True, offset=0):
+        """
+        Выбирает limit записей после курсора (forward) или до него.
+        Записи до курсора возвращаются в обратном порядке.
+        """
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        if not forward:
+            queryset = queryset.order_by(*self._reversed_ordering())
+
+        return list(queryset[offset:offset + limit])
+
+    def _decode(self, cursor):
+        values = decode_cursor(cursor)
+        if len(values) != len(self.fields):
+            raise ValueError('Некорректный курсор')
+
+        return values
+
+    def _build_page(self, rows, number, has_previous, has_next):
+        self.num_pages = number + 1 if has_next else number
+        page = self._get_page(rows, number, self)
+        page.previous_cursor = (
+            encode_cursor(self._key(rows[0])) if has_previous and rows
+            else None
+        )
+        page.next_cursor = (
+            encode_cursor(self._key(rows[-1])) if has_next and rows
+            else None
+        )
+
+        return page
+
+    def first_page(self):
+        """Возвращает первую страницу."""
+        rows = self._fetch(self.per_page + 1)
+
+        return self._build_page(
+            rows[:self.per_page], 1, False, len(rows) > self.per_page,
+        )
+
+    def page_after(self, cursor):
+        """Возвращает страницу, следующую за курсором."""
+        rows = self._fetch(self.per_page + 1, self._decode(cursor))
+
+        return self._build_page(
+            rows[:self.per_page], 2, True, len(rows) > self.per_page,
+        )
+
+    def page_before(self, cursor):
+        """
+        Возвращает страницу, предшествующую курсору.
+        Если до курсора меньше полной страницы, отдает первую страницу.
+        """
+        rows = self._fetch(
+            self.per_page + 1, self._decode(cursor), forward=False,
+        )
+        if len(rows) <= self.per_page:
+            return self.first_page()
+        rows = rows[:self.per_page][::-1]
+
+        return self._build_page(rows, 2, True, True)
+
+    def page(self, number):
+        """
+        Страница по номеру для старых ссылок вида ?page=N.
+        Через OFFSET один раз находится последняя запись предыдущей
+        страницы, и выбрасывается PageMoved с курсором после нее,
+        чтобы клиент перешел на ссылку по курсору. За последней
+        страницей и для N <= 1 отдается первая страница.
+        """
+        number = int(number)
+        if number <= 1:
+            return self.first_page()
+        rows = self._fetch(1, offset=(number - 1) * self.per_page - 1)
+        if not rows:
+            return self.first_page()
+
+        raise PageMoved(encode_cursor(self._key(rows[0])))
+
+    def get_page(self, number=None, after=None, before=None):
+        """
+        Возвращает страницу по курсору или номеру,
+        при некорректных параметрах - первую страницу.
+        """
+        try:
+            if after:
+                return self.page_after(after)
+            if before:
+                return self.page_before(before)
+            if number:
+                return self.page(number)
+        except (TypeError, ValueError, ValidationError):
+            pass
+
+        return self.first_page()
+
 
-from .constants import POST_COUNT
+def cursor_page(request, paginator):
+    """Функция выбирает страницу паджинатора по параметрам запроса."""
+    return paginator.get_page(
+        request.GET.get('page'),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
 
 
-def page_nav(request, posts):
+def page_nav(request, posts, ordering=FEED_ORDERING, per_page=POST_COUNT):
     """Функция которая делит контент по страницам
-    и создает постраничную навигацию.
-    Принимает на вход запрос и данные пост ов,
+    и создает постраничную навигацию по курсору.
+    Принимает на вход запрос и данные постов,
     возвращает объект страницы"""
-    paginator = Paginator(posts, POST_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(posts, per_page, ordering)
+    page_obj = cursor_page(request, paginator)
 
     return page_obj
@@ -1,28 +1,94 @@
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
+from django.views.decorators.http import condition
 
+from .cache import (cache_feed, feed_etag, follow_versions, group_versions,
+                    index_versions, post_versions, profile_versions)
+from .cards import as_cards, card_page, card_rows
+from .constants import COMMENT_COUNT, COMMENT_ORDERING, POST_COUNT
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import page_nav
+from .models import Comment, Follow, Group, Post, User
+from .search import SearchPaginator
+from .thumbnails import page_thumbnails, queue_thumbnails
+from .timeline import HybridTimelinePaginator
+from .utils import cursor_page, page_nav
 
 
-@cache_page(20, key_prefix='index_page')
+def wants_json(request):
+    """Функция проверяет, что клиент просит ответ в JSON."""
+    return 'application/json' in request.META.get('HTTP_ACCEPT', '')
+
+
+def render_cards(request, page_obj, cards_url, **context):
+    """
+    Функция отдает только карточки постов страницы, без base.html,
+    для подгрузки ленты порциями. Адрес следующей порции передается
+    в заголовке Link и в ссылке навигации.
+    """
+    response = render(
+        request,
+        'posts/includes/post_list.html',
+        {
+            'page_obj': page_obj,
+            'thumbnails': page_thumbnails(page_obj),
+            'cards_url': cards_url,
+            **context,
+        },
+    )
+    if page_obj.has_next():
+        next_url = request.build_absolute_uri(cards_url)
+        response['Link'] = (
+            f'<{next_url}?after={page_obj.next_cursor}>; rel="next"'
+        )
+
+    return response
+
+
+def comment_page(request, post_id):
+    """
+    Функция возвращает страницу комментариев к посту по курсору
+    (created, id), старые первыми, вместе с авторами.
+    """
+    return page_nav(
+        request,
+        Comment.objects.filter(post=post_id).select_related('author'),
+        COMMENT_ORDERING,
+        COMMENT_COUNT,
+    )
+
+
+@condition(etag_func=feed_etag(index_versions))
+@cache_feed(index_versions)
 def index(request):
     """
     Функция обрабатывает запросы к главной странице,
     получает данные из модели Post и связанной модели Group,
     выводит 10 последних постов и рендерит их в шаблон.
     """
-    post_list = Post.objects.select_related('group', 'author')
-    page_obj = page_nav(request, post_list)
+    page_obj = card_page(request, Post.objects.all())
     context = {
         'page_obj': page_obj,
+        'thumbnails': page_thumbnails(page_obj),
+        'cards_url': reverse('posts:index_cards'),
     }
 
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=feed_etag(index_versions))
+@cache_feed(index_versions)
+def index_cards(request):
+    """Функция отдает карточки постов главной страницы по курсору."""
+    page_obj = card_page(request, Post.objects.all())
+
+    return render_cards(request, page_obj, reverse('posts:index_cards'))
+
+
+@condition(etag_func=feed_etag(group_versions))
+@cache_feed(group_versions)
 def group_posts(request, slug):
     """
     Функция обрабатывает запросы к странице с публикациями группы,
@@ -30,56 +96,129 @@ def group_posts(request, slug):
     собирает словарь из данных и рендерит их в шаблон.
     """
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
-    page_obj = page_nav(request, post_list)
+    page_obj = card_page(request, group.posts.all())
     context = {
         'group': group,
         'page_obj': page_obj,
+        'thumbnails': page_thumbnails(page_obj),
+        'cards_url': reverse('posts:group_cards', args=(slug,)),
     }
 
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=feed_etag(group_versions))
+@cache_feed(group_versions)
+def group_cards(request, slug):
+    """Функция отдает карточки постов группы по курсору."""
+    group = get_object_or_404(Group, slug=slug)
+    page_obj = card_page(request, group.posts.all())
+
+    return render_cards(
+        request,
+        page_obj,
+        reverse('posts:group_cards', args=(slug,)),
+        group=group,
+    )
+
+
+@condition(etag_func=feed_etag(profile_versions))
+@cache_feed(profile_versions)
 def profile(request, username):
     """
     Функция обрабатывает запросы к странице профиля пользователя,
     получает посты пользователя, собирает словарь и рендерит шаблон.
     """
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group')
+    author = get_object_or_404(
+        User.objects.select_related('counters'),
+        username=username,
+    )
     following = False
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user,
             author=author,
         ).exists()
-    page_obj = page_nav(request, post_list)
+    page_obj = card_page(request, author.posts.all())
     context = {
         'author': author,
         'following': following,
         'page_obj': page_obj,
+        'thumbnails': page_thumbnails(page_obj),
+        'cards_url': reverse('posts:profile_cards', args=(username,)),
     }
 
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=feed_etag(profile_versions))
+@cache_feed(profile_versions)
+def profile_cards(request, username):
+    """Функция отдает карточки постов пользователя по курсору."""
+    author = get_object_or_404(User, username=username)
+    page_obj = card_page(request, author.posts.all())
+
+    return render_cards(
+        request,
+        page_obj,
+        reverse('posts:profile_cards', args=(username,)),
+    )
+
+
+def search(request):
+    """
+    Функция обрабатывает запросы к странице поиска по тексту постов,
+    выводит найденные посты по убыванию релевантности.
+    """
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = cursor_page(request, SearchPaginator(query, POST_COUNT))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'thumbnails': page_thumbnails(page_obj),
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
+@condition(etag_func=feed_etag(post_versions))
 def post_detail(request, post_id):
     """
     Функция обрабатывает запросы к странице поста.
     """
-    post = Post.objects.select_related('group', 'author').get(id=post_id)
+    post = Post.objects.select_related(
+        'group',
+        'author__counters',
+    ).get(id=post_id)
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': comments,
+        'comments': comment_page(request, post_id),
     }
 
     return render(request, 'posts/post_detail.html', context)
 
 
+@condition(etag_func=feed_etag(post_versions))
+def comments(request, post_id):
+    """
+    Функция отдает фрагмент со следующей страницей комментариев
+    к посту для кнопки "Показать еще".
+    """
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': comment_page(request, post_id),
+    }
+
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     """
     Функция обрабатывает запросы к странице добавления поста.
@@ -94,6 +233,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        queue_thumbnails(post)
 
         return redirect('posts:profile', post.author)
 
@@ -107,6 +247,7 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     """
     Функция обрабатывает запросы к странице изменения поста.
@@ -117,11 +258,17 @@ def post_edit(request, post_id):
     if post.author != request.user:
         return redirect('posts:post_detail', post_id)
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        instance=post,
+    )
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        if 'image' in form.changed_data:
+            queue_thumbnails(post)
 
         return redirect('posts:post_detail', post_id)
 
@@ -137,38 +284,90 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     """
     Функция обрабатывает запросы к форме добавления комментария.
     После успешной валидации формы добавляется комментарий на
-    странице поста.
+    странице поста. Клиенту, который просит JSON (Accept), отдается
+    комментарий в JSON, запросу из скрипта (XMLHttpRequest) -
+    фрагмент с комментарием, остальные перенаправляются на пост.
     """
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
     form = CommentForm(request.POST or None)
+    comment = None
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+    if wants_json(request):
+        if comment is None:
+            return JsonResponse({'errors': form.errors}, status=400)
+        return JsonResponse(
+            {
+                'id': comment.id,
+                'text': comment.text,
+                'created': comment.created,
+                'author': comment.author.username,
+            },
+            status=201,
+        )
+    if request.is_ajax():
+        if comment is None:
+            return render(
+                request,
+                'includes/form_errors.html',
+                {'form': form},
+                status=400,
+            )
+        return render(
+            request,
+            'posts/includes/comment.html',
+            {'comment': comment},
+            status=201,
+        )
 
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@condition(etag_func=feed_etag(follow_versions))
+@cache_feed(follow_versions)
 def follow_index(request):
     """
-    Функция обрабатывает запросы к странице подписок пользователя.
+    Функция обрабатывает запросы к странице подписок пользователя,
+    посты читаются из материализованной ленты пользователя
+    и кэша последних постов популярных авторов.
     """
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = page_nav(request, post_list)
+    paginator = HybridTimelinePaginator(
+        request.user, POST_COUNT, card_rows(Post.objects.all()),
+    )
+    page_obj = as_cards(cursor_page(request, paginator))
     context = {
         'page_obj': page_obj,
+        'thumbnails': page_thumbnails(page_obj),
+        'cards_url': reverse('posts:follow_cards'),
     }
 
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@condition(etag_func=feed_etag(follow_versions))
+@cache_feed(follow_versions)
+def follow_cards(request):
+    """Функция отдает карточки постов ленты подписок по курсору."""
+    paginator = HybridTimelinePaginator(
+        request.user, POST_COUNT, card_rows(Post.objects.all()),
+    )
+    page_obj = as_cards(cursor_page(request, paginator))
+
+    return render_cards(request, page_obj, reverse('posts:follow_cards'))
+
+
+@login_required
+@transaction.atomic
 def profile_follow(request, username):
     """
     Функция подписки на авторов.
@@ -181,6 +380,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     """
     Функция отписки от авторов.
@@ -0,0 +1,12 @@
+from django.core.mail import EmailMultiAlternatives
+
+from core.jobs import job
+
+
+@job
+def send_email(subject, body, from_email, to, html_body=None):
+    """Фоновая задача отправки письма через settings.EMAIL_BACKEND."""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body is not None:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
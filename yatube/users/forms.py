@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.template import loader
+
+from .emails import send_email
 
 User = get_user_model()
 
@@ -13,3 +16,23 @@ class CreationForm(UserCreationForm):
             'username',
             'email',
         )
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """
+    Форма восстановления пароля: письмо рендерится в запросе,
+    а отправляется фоновой задачей.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = loader.render_to_string(subject_template_name, context)
+        subject = ''.join(subject.splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = None
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(
+                html_email_template_name, context,
+            )
+        send_email.delay(subject, body, from_email, [to_email], html_body)
@@ -13,10 +13,57 @@ SECRET_KEY = 'th6#2#*&q5@ywn+e#r_267ds!#%o5@jpjwk++2@(%$dkw@8_fc'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Авторы с таким числом подписчиков не раскладываются по лентам
+# при публикации, их посты подмешиваются в ленту при чтении.
+FEED_PULL_FOLLOWERS = 10000
+
+# Число потоков, в которых веб-процесс выполняет фоновые задачи
+# сразу после коммита. При 0 задачи только сохраняются в таблицу
+# и выполняются командой run_jobs.
+JOBS_WORKERS = 2
+JOBS_MAX_ATTEMPTS = 5
+# Задержка перед повтором в секундах, удваивается с каждой попыткой.
+JOBS_RETRY_DELAY = 10
+# Задачи, выполняющиеся дольше, считаются прерванными и повторяются.
+JOBS_TIMEOUT = 60 * 10
+
+# Полные страницы этих разделов кэшируются для анонимных посетителей:
+# PAGE_CACHE_TIMEOUT секунд страница свежая, еще PAGE_CACHE_STALE
+# секунд отдается устаревшая копия, пока страница пересобирается.
+PAGE_CACHE_NAMESPACES = ('posts', 'about')
+PAGE_CACHE_TIMEOUT = 20
+PAGE_CACHE_STALE = 60 * 10
+
+# Значение в кэше пересобирает один процесс, блокировка пересборки
+# снимается через CACHE_LOCK_TIMEOUT секунд, остальные ждут значение
+# не дольше CACHE_LOCK_WAIT секунд. CACHE_XFETCH_BETA > 1 пересобирает
+# значения раньше срока чаще, 0 отключает раннюю пересборку.
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 2
+CACHE_XFETCH_BETA = 1
+
+# Кэш двухуровневый: небольшой LRU в памяти процесса перед общим
+# кэшем 'shared' (core.cache_backends.TwoTierCache). LocMemCache
+# у каждого процесса свой, при нескольких воркерах на одном сервере
+# общий кэш без отдельного сервиса дает SQLiteCache (сравнение -
+# команда bench_cache, доли попаданий - команда cache_stats):
+#     'shared': {
+#         'BACKEND': 'core.cache_backends.SQLiteCache',
+#         'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+#         'OPTIONS': {'MAX_ENTRIES': 100000},
+#     },
 CACHES = {
     'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+        },
+    },
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
 }
 
 DEBUG = True
@@ -38,17 +85,20 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts.middleware.PageMovedMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -80,6 +130,19 @@ DATABASES = {
     }
 }
 
+# Профиль PRAGMA для каждого нового соединения с SQLite:
+# WAL не блокирует читателей на время записи.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_CHECKPOINT_INTERVAL = 300
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -109,3 +172,15 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загрузки сразу пишутся во временный файл, а не собираются в памяти,
+# данные сверх FILE_UPLOAD_MAX_SIZE байт не записываются.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploadhandler.LimitedTemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+# Картинки постов больше стольких пикселей отклоняются по заголовку
+# файла, до декодирования.
+POST_IMAGE_MAX_PIXELS = 40_000_000
+# Движок sorl-thumbnail, уменьшающий JPEG уже при декодировании.
+THUMBNAIL_ENGINE = 'posts.images.DraftEngine'